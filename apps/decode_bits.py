@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+
+# Copyright 2026 Clayton Smith
+#
+# This file is part of gr-elster
+#
+# gr-elster is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# gr-elster is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gr-elster; see the file COPYING.  If not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street,
+# Boston, MA 02110-1301, USA.
+
+# Decodes recorded slicer output (one unpacked .u8 bit file per channel)
+# with the same framer as packetize, without a flowgraph, and writes the
+# valid frames to one time-ordered pcap file.
+
+import argparse
+import concurrent.futures
+import functools
+import os
+import numpy
+from elster.capture import MAX_FRAME_BITS
+from elster.crc import check_crc_x25
+from elster.dedup import dedup_cache
+from elster.framer import check_length, framer
+from elster.metrics import channel_stats
+from elster.pcap import pcap_writer
+from elster.sync import find_sync, SYNC_LEN
+
+SYMBOL_RATE = 142222
+CHUNK_BITS = 1 << 20
+# A frame whose sync starts in a segment can end this far past the segment
+OVERLAP = SYNC_LEN + MAX_FRAME_BITS
+
+
+def decode_segment(filename, channel, start, end, max_sync_errors, max_manchester_errors):
+    """Return (offset, channel, packet) for valid frames whose sync starts in [start, end), and the stats."""
+    bits = numpy.memmap(filename, dtype=numpy.uint8, mode="r")
+    stop = min(end + OVERLAP, len(bits))
+    stats = channel_stats()
+    f = framer(functools.partial(find_sync, max_errors=max_sync_errors), stats=stats)
+    frames = []
+    for offset in range(start, stop, CHUNK_BITS):
+        frames += f.work(bits[offset:min(offset + CHUNK_BITS, stop)])
+    stats.bits_consumed = min(end, len(bits)) - start
+
+    candidates = []
+    for frame in frames:
+        if frame.offset + start >= end:
+            continue
+        if max_manchester_errors is not None and frame.manchester_errors > max_manchester_errors:
+            stats.manchester_rejects += 1
+        elif not check_length(frame.data):
+            stats.length_rejects += 1
+        else:
+            candidates.append(frame)
+
+    packets = []
+    for frame, ok in zip(candidates, check_crc_x25([frame.data for frame in candidates])):
+        if ok:
+            stats.valid_frames += 1
+            packets.append((frame.offset + start, channel, frame.data[:-2]))
+        else:
+            stats.crc_failures += 1
+    return packets, stats.as_dict()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Decode recorded Elster bit streams into a pcap file.")
+    parser.add_argument("files", nargs="+", help="unpacked .u8 bit files, one per channel, in channel order")
+    parser.add_argument("-o", "--output", help="output file (default: elster-bits.pcap, or .pcapng with --pcapng)")
+    parser.add_argument("--start", type=float, help="UNIX time of the first bit (default: file mtime minus its duration)")
+    parser.add_argument("--bit-rate", type=float, default=SYMBOL_RATE)
+    parser.add_argument("--segment-bits", type=int, default=1 << 26,
+                        help="split files into segments of this many bits, 0 for one job per file")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count())
+    parser.add_argument("--max-sync-errors", type=int, default=0)
+    parser.add_argument("--max-manchester-errors", type=int)
+    parser.add_argument("--pcapng", action="store_true", help="write pcapng with one interface per channel")
+    parser.add_argument("--keep-duplicates", action="store_true", help="keep packets repeated on several channels")
+    parser.add_argument("--dedup-ttl", type=float, default=2.0)
+    args = parser.parse_args()
+    if args.output is None:
+        args.output = "elster-bits.pcapng" if args.pcapng else "elster-bits.pcap"
+
+    starts = []
+    jobs = []
+    for channel, filename in enumerate(args.files):
+        size = os.path.getsize(filename)
+        starts.append(args.start if args.start is not None else os.path.getmtime(filename) - size / args.bit_rate)
+        segment = args.segment_bits or size or 1
+        for start in range(0, size, segment):
+            jobs.append((filename, channel, start, start + segment, args.max_sync_errors, args.max_manchester_errors))
+
+    packets = []
+    totals = [channel_stats() for _ in args.files]
+    with concurrent.futures.ProcessPoolExecutor(args.jobs) as executor:
+        for job, (job_packets, job_stats) in zip(jobs, executor.map(decode_segment, *zip(*jobs))):
+            packets += job_packets
+            for field, value in job_stats.items():
+                setattr(totals[job[1]], field, getattr(totals[job[1]], field) + value)
+
+    packets = sorted((starts[channel] + offset / args.bit_rate, channel, pkt) for offset, channel, pkt in packets)
+    dedup = None if args.keep_duplicates else dedup_cache(args.dedup_ttl, max_entries=1 << 20)
+    pcap = pcap_writer(args.output, queue_size=0, flush_packets=0, pcapng=args.pcapng, num_interfaces=len(args.files))
+    for timestamp, channel, pkt in packets:
+        if dedup is not None and not dedup.check(pkt, timestamp):
+            totals[channel].duplicates += 1
+            continue
+        pcap.write(timestamp, pkt, channel)
+    pcap.close()
+
+    for channel, stats in enumerate(totals):
+        print(f"{channel:02}  {stats.bits_consumed} bits  {stats.valid_frames} valid  {stats.duplicates} duplicate  "
+              f"{stats.crc_failures} bad CRC  {stats.length_rejects} bad length  {stats.manchester_rejects} Manchester")
+    print(f"{pcap.written} packets written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 
-# Copyright 2013, 2014, 2019, 2021 Clayton Smith
+# Copyright 2013, 2014, 2019, 2021, 2026 Clayton Smith
 #
 # This file is part of gr-elster
 #
@@ -19,226 +19,91 @@
 # the Free Software Foundation, Inc., 51 Franklin Street,
 # Boston, MA 02110-1301, USA.
 
-import datetime
-import struct
+import argparse
+import collections
+import concurrent.futures
+import os
+import shutil
 import sys
-import time
+import tempfile
+import numpy
 import pygraphviz
-
-meter_first_hour = {}
-meter_last_hour = {}
-meter_readings = {}
-
-meter_parents = {}
-meter_gatekeepers = {}
-meter_levels = {}
-
-
-def add_hourly(meter, last_hour, readings):
-    first_hour = last_hour - len(readings) + 1
-    if meter not in meter_readings:
-        meter_first_hour[meter] = first_hour
-        meter_last_hour[meter] = last_hour
-        meter_readings[meter] = [-1] * 65536
-    if (first_hour - meter_first_hour[meter]) % 65536 > 32768:
-        meter_first_hour[meter] = first_hour
-    if (last_hour - meter_last_hour[meter]) % 65536 < 32768:
-        meter_last_hour[meter] = last_hour
-    for i, reading in enumerate(readings):
-        meter_readings[meter][i + first_hour] = reading
-
-
-def decode_ts(ts_bytes):
-    ts1, ts2, ts3 = struct.unpack(">BBB", ts_bytes)
-    ts = ((ts1 << 16) + (ts2 << 8) + ts3)
-    ts_h = ts // (128 * 3600)
-    ts -= ts_h * 128 * 3600
-    ts_m = ts // (128 * 60)
-    ts -= ts_m * 128 * 60
-    ts_s = ts / 128
-    return ts_h, ts_m, ts_s
-
-
-def decode_date(date_bytes):
-    short, = struct.unpack(">H", date_bytes)
-    year = 2000 + (short >> 9)
-    days = short & 0x1FF
-    date = datetime.date(year, 1, 1)
-    delta = datetime.timedelta(days)
-    return date + delta
-
-
-def print_pkt(timestamp, pkt):
-    print(time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(timestamp)), end=" ")
-    len1, flag1, src, dst, unk1, unk2, unk3 = struct.unpack(">BBIIBBB", pkt[0:13])
-    print(f"len={len1:02x} flag={flag1:02x} {src=:08x} {dst=:08x} {unk1:02x}{unk2:02x}{unk3:02x}", end=" ")
-    if (src & 0x80000000) or (dst == 0 and len1 >= 35):
-        ts_h, ts_m, ts_s = decode_ts(pkt[13:16])
-        print(f"ts={ts_h:02}:{ts_m:02}:{ts_s:06.3f}", end=" ")
-    else:
-        print("rpt=" + pkt[13:14].hex() + " " + pkt[14:16].hex(), end=" ")
-
-    if dst == 0 and len1 >= 35:  # flood broadcast message
-        unk4, unk5, hop, unk7, addr, unk8, len2 = struct.unpack(">BBBBIIB", pkt[16:29])
-        print(f"{unk4:02x}{unk5:02x} {hop=:02x} {unk7:02x} {addr=:08x} {unk8:08x} len={len2:02x}", end=" ")
-        if len2 == 0:
-            print(pkt[29:33].hex(), end=" ")
-            unk9, len3 = struct.unpack(">BB", pkt[33:35])
-            print(f"{unk9:02x}", end=" ")
-            print("next_" + str(len3) + "_days=" + pkt[35:].hex())
-        elif len2 == 6:
-            print(pkt[29:33].hex(), end=" ")
-            print("date=" + str(decode_date(pkt[33:35])))
-        elif len2 == 0x27:
-            print(pkt[29:33].hex(), end=" ")
-            for x in range(7):  # 7 meter numbers (with first bit sometimes set to 1) followed by number 0x01-0x45
-                print(pkt[33 + 5*x:37 + 5*x].hex(), end=" ")
-                print(pkt[37 + 5*x:38 + 5*x].hex(), end=" ")
-            print()
-        else:
-            print(pkt[29:].hex())
-    else:
-        if src & 0x80000000:
-            print("path=" + pkt[16:24].hex(), end=" ")
-            if pkt[24] == 0x40:
-                print(pkt[24:28].hex(), end=" ")
-                len4, unk12, cmd, cnt = struct.unpack(">BBBB", pkt[28:32])
-                print(f"len={len4:02x} {unk12:02x} {cmd=:02x} {cnt=:02x}", end=" ")
-
-                if cmd == 0xce:  # fetch hourly usage data, every 6 hours
-                    unk13, first_hour = struct.unpack(">BH", pkt[32:])
-                    print(f"{unk13:02x} {first_hour=:05}")
-                elif cmd == 0x22:
-                    print(pkt[32:].hex())
-                elif cmd == 0x23:  # path building stuff? every 6 hours
-                    unk14, unk15, unk16, your_id, par_id, parent, unk17, n_children, unk19, level, unk21, unk22, unk23, unk24, unk25, unk26, unk27, unk28, unk29 = struct.unpack(">BBBBBIBBBBBBBBBBHIB", pkt[32:58])
-                    print(f"{unk14:02x} {unk15:02x} {unk16:02x} id={your_id:02x} {par_id=:02x} {parent=:08x} {unk17:02x} #child={n_children} {unk19:02x} lvl={level} {unk21:02x}{unk22:02x}{unk23:02x} {unk24:02x} {unk25:02x} {unk26:02x} {unk27:04x} {unk28:08x} {unk29:02x}", end=" ")
-                    if len4 == 0x20:
-                        print("{:02x}".format(pkt[58]), end=" ")
-                        print("date=" + str(decode_date(pkt[59:61])))
-                    else:
-                        print()
-
-                    # Prepare graph edges
-                    meter_parents[dst] = parent
-                    if level == 2:
-                        meter_parents[parent] = src  # Fill this in now, in case we don't hear from parent
-
-                    meter_gatekeepers[dst] = src
-                    if level >= 2:
-                        meter_gatekeepers[parent] = src  # Fill this in now, in case we don't hear from parent
-
-                    meter_levels[dst] = level
-                    meter_levels[parent] = level - 1
-                    meter_levels[src] = 0
-                elif cmd == 0x28:
-                    print(pkt[32:].hex())
-                elif cmd == 0x6a:
-                    print(pkt[32:].hex())
-                else:  # unknown command
-                    print(pkt[32:].hex())
-            else:
-                print(pkt[24:].hex())
-        else:
-            if len(pkt) > 16:
-                len4 = pkt[16]
-                if len4 == len1 - 17:  # 1st byte of payload is a length
-                    if len(pkt) > 18:
-                        cmd = pkt[18]
-                        if cmd == 0xce:  # hourly usage data, every 6 hours
-                            if len4 >= 10:
-                                unk10, cmd, ctr, unk11, flag2, cur_hour, last_hour, n_hours = struct.unpack(">BBBBBHHB", pkt[17:27])
-                                print(f"len={len4:02x} {unk10:02x} {cmd=:02x} {ctr=:02x} {unk11:02x} {flag2:02x} {cur_hour=:05} {last_hour=:05} n_hour={n_hours:02}", pkt[27:].hex())
-                                add_hourly(src, last_hour, struct.unpack(">" + "H"*n_hours, pkt[27:27 + 2*n_hours]))
-                            elif len4 >= 6:
-                                unk10, cmd, ctr, unk11, unk12, unk13 = struct.unpack(">BBBBBB", pkt[17:23])
-                                print(f"len={len4:02x} {unk10:02x} {cmd=:02x} {ctr=:02x} {unk11:02x} {unk12:02x} {unk13:02x}", pkt[23:].hex())
-                            else:
-                                print("todo=" + pkt[17:].hex())
-                            # TODO: Get total meter reading
-                        elif cmd == 0x22:  # just an acknowledgement
-                            unk10, cmd, ctr = struct.unpack(">BBB", pkt[17:20])
-                            print(f"len={len4:02x} {unk10:02x} {cmd=:02x} {ctr=:02x}", pkt[20:].hex())
-                        elif cmd == 0x23:  # path building stuff? every 6 hours
-                            unk10, cmd, ctr = struct.unpack(">BBB", pkt[17:20])
-                            print(f"len={len4:02x} {unk10:02x} {cmd=:02x} {ctr=:02x}", pkt[20:].hex())
-                            # TODO: Parse the rest
-                        elif cmd == 0x28:  # just an acknowledgement
-                            unk10, cmd, ctr = struct.unpack(">BBB", pkt[17:20])
-                            print(f"len={len4:02x} {unk10:02x} {cmd=:02x} {ctr=:02x}", pkt[20:].hex())
-                        elif cmd == 0x6a:
-                            unk10, cmd, ctr = struct.unpack(">BBB", pkt[17:20])
-                            print(f"len={len4:02x} {unk10:02x} {cmd=:02x} {ctr=:02x}", pkt[20:].hex())
-                            # TODO: Parse the rest
-                        else:
-                            print("todo=" + pkt[16:].hex())
-                            # TODO: Investigate these
-                    else:
-                        print(f"len={len4:02x}" + " data=" + pkt[17:].hex())
-                else:
-                    print("weird=" + pkt[16:].hex())  # this happens from time to time
-            else:
-                print()
-
-
-if len(sys.argv) < 2:
-    sys.stderr.write("Usage: decode_pcap.py input_file...\n")
-    sys.exit(1)
-
-for filename in sys.argv[1:]:
-    f = open(filename, "rb")
-    magic = f.read(4)
-
-    if magic == b"\xa1\xb2\xc3\xd4":  # big endian
-        endian = ">"
-    elif magic == b"\xd4\xc3\xb2\xa1":  # little endian
-        endian = "<"
+from elster.decoder import packet_decoder
+from elster.pcap import pcap_reader
+
+
+def decode_file(filename, output):
+    """Decode one file with a fresh decoder, writing its records to output; return the decoder."""
+    decoder = packet_decoder()
+    with pcap_reader(filename) as packets, open(output, "w") as f:
+        for timestamp, pkt in packets:
+            f.write(f"{decoder.decode(timestamp, pkt)}\n")
+    return decoder
+
+
+def finish_file(output, future, decoder):
+    decoder.merge(future.result())
+    with open(output) as f:
+        shutil.copyfileobj(f, sys.stdout)
+    os.remove(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Decode Elster packets from pcap files.")
+    parser.add_argument("files", nargs="+", help="pcap or pcapng files, in time order")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="decode this many files at once in worker processes")
+    args = parser.parse_args()
+
+    decoder = packet_decoder()
+    if args.jobs > 1:
+        with tempfile.TemporaryDirectory(prefix="decode_pcap-") as tmpdir, \
+                concurrent.futures.ProcessPoolExecutor(args.jobs) as executor:
+            # Output is copied out in file order; only a few files are decoded ahead of it
+            pending = collections.deque()
+            for i, filename in enumerate(args.files):
+                if len(pending) == 2 * args.jobs:
+                    finish_file(*pending.popleft(), decoder)
+                output = os.path.join(tmpdir, f"{i}.txt")
+                pending.append((output, executor.submit(decode_file, filename, output)))
+            while pending:
+                finish_file(*pending.popleft(), decoder)
     else:
-        raise Exception("Not a pcap capture file (bad magic)")
-    hdr = f.read(20)
-    if len(hdr) < 20:
-        raise Exception("Invalid pcap file (too short)")
-    vermaj, vermin, tz, sig, snaplen, linktype = struct.unpack(endian+"HHIIII", hdr)
-
-    packets = {}
-    while True:
-        hdr = f.read(16)
-        if len(hdr) < 16:
-            break
-        sec, usec, caplen, wirelen = struct.unpack(endian+"IIII", hdr)
-        pkt = f.read(caplen)
-        print_pkt(sec + usec / 1000000, pkt)
-
-print()
-
-for meter in sorted(meter_readings.keys()):
-    print("Readings for LAN ID " + str(meter) + ":", end=" ")
-    if meter_first_hour[meter] > meter_last_hour[meter]:
-        meter_last_hour[meter] += 65536
-    for hour in range(meter_first_hour[meter], meter_last_hour[meter] + 1):
-        print("{:5.2f}".format(meter_readings[meter][hour % 65536] / 100) if meter_readings[meter][hour % 65536] >= 0 else "   ? ", end=" ")
+        for filename in args.files:
+            with pcap_reader(filename) as packets:
+                for timestamp, pkt in packets:
+                    print(decoder.decode(timestamp, pkt))
+
     print()
 
+    for meter in sorted(decoder.readings.keys()):
+        readings = decoder.meter_readings(meter)
+        text = numpy.char.mod("%5.2f", readings / 100)
+        text[readings < 0] = "   ? "
+        print("Readings for LAN ID " + str(meter) + ":", *text, "")
+
+    G = pygraphviz.AGraph(directed=True, ranksep=2.0, rankdir="RL")
+
+    for meter, parent in decoder.parents.items():
+        meter_name = f"{meter:08x}"
+        parent_name = f"{parent:08x}"
+        if parent & 0x80000000:
+            G.add_node(parent_name, color="red", rank="max")
+        G.add_edge(meter_name, parent_name)
 
-G = pygraphviz.AGraph(directed=True, ranksep=2.0, rankdir="RL")
+        if (decoder.levels[parent] >= 2) and (parent not in decoder.parents):
+            gatekeeper_name = "{:08x}".format(decoder.gatekeepers[meter])
 
-for meter, parent in meter_parents.items():
-    meter_name = f"{meter:08x}"
-    parent_name = f"{parent:08x}"
-    if parent & 0x80000000:
-        G.add_node(parent_name, color="red", rank="max")
-    G.add_edge(meter_name, parent_name)
+            G.add_node(gatekeeper_name, color="red", rank="max")
+            G.add_node("Level 1\n(" + gatekeeper_name + ")", color="gray")
+            G.add_edge("Level 1\n(" + gatekeeper_name + ")", gatekeeper_name)
+            for x in range(1, decoder.levels[parent] - 1):
+                G.add_node("Level " + str(x+1) + "\n(" + gatekeeper_name + ")", color="gray")
+                G.add_edge("Level " + str(x+1) + "\n(" + gatekeeper_name + ")", "Level " + str(x) + "\n(" + gatekeeper_name + ")")
+            G.add_edge(parent_name, "Level " + str(decoder.levels[parent] - 1) + "\n(" + gatekeeper_name + ")")
 
-    if (meter_levels[parent] >= 2) and (parent not in meter_parents):
-        gatekeeper_name = "{:08x}".format(meter_gatekeepers[meter])
+    G.layout(prog="dot")
+    G.draw("mesh.pdf")
 
-        G.add_node(gatekeeper_name, color="red", rank="max")
-        G.add_node("Level 1\n(" + gatekeeper_name + ")", color="gray")
-        G.add_edge("Level 1\n(" + gatekeeper_name + ")", gatekeeper_name)
-        for x in range(1, meter_levels[parent] - 1):
-            G.add_node("Level " + str(x+1) + "\n(" + gatekeeper_name + ")", color="gray")
-            G.add_edge("Level " + str(x+1) + "\n(" + gatekeeper_name + ")", "Level " + str(x) + "\n(" + gatekeeper_name + ")")
-        G.add_edge(parent_name, "Level " + str(meter_levels[parent] - 1) + "\n(" + gatekeeper_name + ")")
 
-G.layout(prog="dot")
-G.draw("mesh.pdf")
+if __name__ == "__main__":
+    main()
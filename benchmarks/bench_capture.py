@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+# Copyright 2026 Clayton Smith
+#
+# This file is part of gr-elster
+#
+# gr-elster is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# gr-elster is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gr-elster; see the file COPYING.  If not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street,
+# Boston, MA 02110-1301, USA.
+
+# Compares per-channel frame capture with numpy.append against the
+# preallocated capture_buffer used by packetize.
+
+import argparse
+import time
+import tracemalloc
+import numpy
+from elster.capture import capture_buffer, MAX_TYPE_2_BITS
+
+
+class append_capture:
+    def __init__(self, n_channels, frame_bits):
+        self.frame_bits = frame_bits
+        self.packet_bits = [numpy.array([], dtype=numpy.uint8) for _ in range(n_channels)]
+        self.bits_remaining = [frame_bits] * n_channels
+
+    def work(self, chunk):
+        for channel in range(len(self.packet_bits)):
+            if self.bits_remaining[channel] == 0:
+                self.packet_bits[channel] = numpy.array([], dtype=numpy.uint8)
+                self.bits_remaining[channel] = self.frame_bits
+            bits_to_take = min(self.bits_remaining[channel], len(chunk))
+            self.packet_bits[channel] = numpy.append(self.packet_bits[channel], chunk[:bits_to_take])
+            self.bits_remaining[channel] -= bits_to_take
+
+
+class preallocated_capture:
+    def __init__(self, n_channels, frame_bits):
+        self.frame_bits = frame_bits
+        self.captures = [capture_buffer() for _ in range(n_channels)]
+
+    def work(self, chunk):
+        for capture in self.captures:
+            if capture.remaining == 0:
+                capture.start(self.frame_bits)
+            capture.extend(chunk)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-channel packet capture buffers.")
+    parser.add_argument("--channels", type=int, default=25)
+    parser.add_argument("--chunk", type=int, default=64, help="items handed over per scheduler call")
+    parser.add_argument("--frames", type=int, default=20, help="frames captured per channel")
+    parser.add_argument("--frame-bits", type=int, default=MAX_TYPE_2_BITS)
+    args = parser.parse_args()
+
+    rng = numpy.random.default_rng(0)
+    n_chunks = args.frames * -(-args.frame_bits // args.chunk)
+    chunks = [rng.integers(0, 2, args.chunk, dtype=numpy.uint8) for _ in range(n_chunks)]
+
+    print(f"{args.channels} channels, {args.frames} frames of {args.frame_bits} bits, {args.chunk} items per call")
+    for name, strategy in [("numpy.append", append_capture), ("capture_buffer", preallocated_capture)]:
+        state = strategy(args.channels, args.frame_bits)
+        start = time.perf_counter()
+        for chunk in chunks:
+            state.work(chunk)
+        elapsed = time.perf_counter() - start
+
+        # tracemalloc slows allocation down, so memory is measured in a second, untimed
+        # run.  The baseline comes first, so preallocated buffers count towards the peak.
+        tracemalloc.start()
+        baseline, _ = tracemalloc.get_traced_memory()
+        state = strategy(args.channels, args.frame_bits)
+        for chunk in chunks:
+            state.work(chunk)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"  {name:15} {elapsed * 1000:8.1f} ms  {(peak - baseline) / 1024:8.1f} KiB peak above baseline")
+
+
+if __name__ == "__main__":
+    main()
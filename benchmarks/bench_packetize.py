@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+
+# Copyright 2026 Clayton Smith
+#
+# This file is part of gr-elster
+#
+# gr-elster is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# gr-elster is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gr-elster; see the file COPYING.  If not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street,
+# Boston, MA 02110-1301, USA.
+
+# Measures packetize throughput on synthetic bit streams, either by calling
+# general_work directly or through a GNU Radio flowgraph.  Results can be
+# saved as a JSON baseline and compared against on later runs.  --packetize
+# benchmarks a self-contained packetize.py instead of the installed block,
+# such as the pre-series one in baseline-original.json:
+#
+#   git show 22e093e:python/packetize.py > /tmp/packetize_original.py
+#   bench_packetize.py --packetize /tmp/packetize_original.py
+
+import argparse
+import contextlib
+import importlib.util
+import json
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+import numpy
+from gnuradio import gr, blocks
+from elster import packetize
+from elster.encoder import channel_streams, frame_bits, noise_bits, random_packet
+
+PAYLOAD_LEN = 40
+
+
+def sparse_stream(rng, n_bits, occupancy):
+    # Frames take up to occupancy of the n_bits (at least one frame), with random noise gaps between them
+    frames = []
+    used = 0
+    while True:
+        bits = frame_bits(random_packet(rng, 1 + len(frames) % 2, PAYLOAD_LEN))
+        if frames and used + len(bits) > n_bits * occupancy:
+            break
+        frames.append(bits)
+        used += len(bits)
+    cuts = numpy.sort(rng.integers(0, max(n_bits - used, 0) + 1, len(frames)))
+    gaps = numpy.diff(cuts, prepend=0)
+    parts = []
+    for gap, bits in zip(gaps, frames):
+        parts += [noise_bits(rng, int(gap)), bits]
+    parts.append(noise_bits(rng, max(n_bits - used - int(cuts[-1]), 0)))
+    return numpy.concatenate(parts)
+
+
+def make_streams(rng, scenario, n_channels, n_bits):
+    if scenario == "idle":
+        return [noise_bits(rng, n_bits) for _ in range(n_channels)]
+    if scenario == "sparse":
+        # 1% of the bits on each channel belong to a frame
+        return [sparse_stream(rng, n_bits, 0.01) for _ in range(n_channels)]
+
+    # Back-to-back frames, each repeated on up to three channels
+    mean_frame = numpy.mean([len(frame_bits(random_packet(rng, t, PAYLOAD_LEN))) for t in (1, 2)])
+    mean_gap = 160
+    copies = min(3, n_channels)
+    n_packets = max(int(n_bits * n_channels / copies / (mean_frame + mean_gap)), 1)
+    packets = [random_packet(rng, 1 + i % 2, PAYLOAD_LEN) for i in range(n_packets)]
+    gap = (int(mean_gap / 2), int(mean_gap * 3 / 2) + 1)
+    streams, _ = channel_streams(rng, packets, n_channels, copies, gap)
+    return streams
+
+
+def load_packetize(filename):
+    # Older blocks take only the number of inputs and print every frame
+    spec = importlib.util.spec_from_file_location("packetize_under_test", filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return lambda num_inputs: module.packetize(num_inputs)
+
+
+def frame_count(dut):
+    # Blocks from before the per-channel statistics do not count their frames
+    if not hasattr(dut, "stats"):
+        return None
+    return sum(stats.valid_frames for stats in dut.stats)
+
+
+def run_direct(make_block, streams, chunk, trace=False):
+    dut = make_block(len(streams))
+    # Outside a flowgraph, positions advance by what the block consumes
+    positions = [0] * len(streams)
+
+    def consume(channel, n):
+        positions[channel] += n
+    dut.consume = consume
+    transient = 0
+    start = time.perf_counter()
+    while True:
+        needed = dut.forecast(chunk, len(streams))
+        if any(p + n > len(bits) for p, n, bits in zip(positions, needed, streams)):
+            break
+        items = [bits[p:p + max(n, chunk)] for p, n, bits in zip(positions, needed, streams)]
+        if trace:
+            current, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+        dut.general_work(items, [])
+        if trace:
+            _, peak = tracemalloc.get_traced_memory()
+            transient += peak - current
+    elapsed = time.perf_counter() - start
+    if hasattr(dut, "stop"):
+        dut.stop()
+    return dut, elapsed, transient
+
+
+def run_flowgraph(make_block, streams):
+    tb = gr.top_block()
+    dut = make_block(len(streams))
+    for channel, bits in enumerate(streams):
+        tb.connect(blocks.vector_source_b(bits.tolist()), (dut, channel))
+    start = time.perf_counter()
+    tb.run()
+    elapsed = time.perf_counter() - start
+    return dut, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark packetize on synthetic bit streams.")
+    parser.add_argument("--mode", choices=["direct", "flowgraph"], default="direct")
+    parser.add_argument("--scenarios", nargs="+", choices=["idle", "sparse", "burst"], default=["idle", "sparse", "burst"])
+    parser.add_argument("--channels", type=int, nargs="+", default=[1, 6, 25])
+    parser.add_argument("--bits", type=int, default=400000, help="bits per channel")
+    parser.add_argument("--chunk", type=int, default=4096, help="items per general_work call in direct mode")
+    parser.add_argument("--save", metavar="FILE", help="write the results as a JSON baseline")
+    parser.add_argument("--compare", metavar="FILE", help="compare bits/s against a JSON baseline")
+    parser.add_argument("--packetize", metavar="FILE", help="benchmark the packetize block defined in FILE")
+    args = parser.parse_args()
+
+    if args.packetize:
+        make_block = load_packetize(args.packetize)
+    else:
+        make_block = lambda num_inputs: packetize(num_inputs, print_mode="off")
+
+    save = os.path.abspath(args.save) if args.save else None
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = {(r["mode"], r["scenario"], r["channels"]): r for r in json.load(f)["results"]}
+
+    # packetize writes its pcap to the current directory
+    os.chdir(tempfile.mkdtemp(prefix="bench_packetize-"))
+    results = []
+    print(f"{args.mode}, {args.bits} bits per channel")
+    for scenario in args.scenarios:
+        for n_channels in args.channels:
+            rng = numpy.random.default_rng(0)
+            streams = make_streams(rng, scenario, n_channels, args.bits)
+            total_bits = sum(len(bits) for bits in streams)
+
+            # Blocks that print every frame print nothing here
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                if args.mode == "direct":
+                    dut, elapsed, _ = run_direct(make_block, streams, args.chunk)
+                    tracemalloc.start()
+                    _, _, transient = run_direct(make_block, streams, args.chunk, trace=True)
+                    tracemalloc.stop()
+                else:
+                    dut, elapsed = run_flowgraph(make_block, streams)
+                    transient = None
+
+            frames = frame_count(dut)
+            result = {
+                "mode": args.mode,
+                "scenario": scenario,
+                "channels": n_channels,
+                "bits": total_bits,
+                "frames": frames,
+                "seconds": elapsed,
+                "bits_per_second": total_bits / elapsed,
+                "frames_per_second": frames / elapsed if frames is not None else None,
+                # Summed per-call tracemalloc peaks: memory the hot loop allocated and released again
+                "transient_bytes_per_frame": transient / frames if transient is not None and frames else None,
+            }
+            results.append(result)
+
+            line = f"  {scenario:6} {n_channels:3} ch  {result['bits_per_second'] / 1e6:8.3f} Mbit/s"
+            if frames is not None:
+                line += f"  {result['frames_per_second']:9.1f} frames/s"
+            if result["transient_bytes_per_frame"] is not None:
+                line += f"  {result['transient_bytes_per_frame'] / 1024:8.1f} KiB/frame"
+            old = baseline.get((args.mode, scenario, n_channels))
+            if old:
+                line += f"  {result['bits_per_second'] / old['bits_per_second']:6.2f}x baseline"
+            print(line)
+
+    if save:
+        with open(save, "w") as f:
+            json.dump({"python": platform.python_version(), "machine": platform.machine(),
+                       "numpy": numpy.__version__, "results": results}, f, indent=1)
+
+
+if __name__ == "__main__":
+    main()
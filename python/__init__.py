@@ -32,5 +32,10 @@ except ImportError:
     pass
 
 # import any pure python here
-from .packetize import packetize
+try:
+    # the block needs GNU Radio, but the decoder, pcap and sync modules do not
+    from .packetize import packetize
+except ModuleNotFoundError as e:
+    if e.name.partition(".")[0] not in ("gnuradio", "pmt"):
+        raise
 #
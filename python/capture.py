@@ -0,0 +1,57 @@
+#
+# Copyright 2026 Clayton Smith.
+#
+# This is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this software; see the file COPYING.  If not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street,
+# Boston, MA 02110-1301, USA.
+#
+
+import numpy
+
+# Type 1 frames have an 8-bit length and 64 bits per byte, type 2 frames a length below 512 and 8 bits per byte
+MAX_TYPE_1_BITS = (255 + 2) * 64
+MAX_TYPE_2_BITS = (511 + 2) * 8
+MAX_FRAME_BITS = max(MAX_TYPE_1_BITS, MAX_TYPE_2_BITS)
+
+
+class capture_buffer:
+    """Fixed-capacity bit buffer reused for every frame captured on a channel."""
+
+    def __init__(self, capacity=MAX_FRAME_BITS, dtype=numpy.uint8):
+        self.buffer = numpy.zeros(capacity, dtype=dtype)
+        self.size = 0
+        self.fill = 0
+
+    @property
+    def remaining(self):
+        return self.size - self.fill
+
+    def start(self, size):
+        if size > len(self.buffer):
+            raise ValueError(f"Frame of {size} bits exceeds capture capacity of {len(self.buffer)} bits.")
+        self.size = size
+        self.fill = 0
+
+    def extend(self, bits):
+        n = min(self.size - self.fill, len(bits))
+        self.buffer[self.fill:self.fill + n] = bits[:n]
+        self.fill += n
+        return n
+
+    def bits(self):
+        return self.buffer[:self.fill]
+
+    def reset(self):
+        self.size = 0
+        self.fill = 0
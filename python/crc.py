@@ -0,0 +1,72 @@
+#
+# Copyright 2026 Clayton Smith.
+#
+# This is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this software; see the file COPYING.  If not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street,
+# Boston, MA 02110-1301, USA.
+#
+
+import numpy
+
+POLY = 0x8408
+# Register value left after running the CRC over a message followed by its own FCS
+GOOD_RESIDUE = 0xf0b8
+
+
+def _make_table():
+    table = []
+    for byte in range(256):
+        reg = byte
+        for _ in range(8):
+            reg = (reg >> 1) ^ POLY if reg & 1 else reg >> 1
+        table.append(reg)
+    return table
+
+
+TABLE = _make_table()
+_TABLE_ARRAY = numpy.array(TABLE, dtype=numpy.uint16)
+
+# Below this many frames, the per-byte overhead of NumPy outweighs vectorizing across frames
+_BATCH_THRESHOLD = 32
+
+
+def crc_x25_register(message, reg=0xffff):
+    table = TABLE
+    for byte in message:
+        reg = (reg >> 8) ^ table[(reg ^ byte) & 0xff]
+    return reg
+
+
+def crc_x25(message):
+    reg = crc_x25_register(message) ^ 0xffff
+    return bytes([reg & 0xff, reg >> 8])
+
+
+def check_crc_x25(frames):
+    """Return a boolean array telling which frames (each ending in its FCS) are valid."""
+    n = len(frames)
+    if n < _BATCH_THRESHOLD:
+        return numpy.array([len(frame) >= 2 and crc_x25_register(frame) == GOOD_RESIDUE for frame in frames], dtype=bool)
+
+    lengths = numpy.fromiter((len(frame) for frame in frames), dtype=numpy.int64, count=n)
+    width = int(lengths.max()) if n else 0
+    data = numpy.zeros((n, width), dtype=numpy.uint8)
+    for i, frame in enumerate(frames):
+        data[i, :lengths[i]] = numpy.frombuffer(frame, dtype=numpy.uint8)
+
+    reg = numpy.full(n, 0xffff, dtype=numpy.uint16)
+    for column in range(width):
+        updated = (reg >> 8) ^ _TABLE_ARRAY[(reg ^ data[:, column]) & 0xff]
+        numpy.copyto(reg, updated, where=column < lengths)
+    return (reg == GOOD_RESIDUE) & (lengths >= 2)
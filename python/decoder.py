@@ -0,0 +1,434 @@
+#
+# Copyright 2026 Clayton Smith.
+#
+# This is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this software; see the file COPYING.  If not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street,
+# Boston, MA 02110-1301, USA.
+#
+
+import collections
+import datetime
+import struct
+import time
+import numpy
+
+HOURS = 65536
+CHUNK_HOURS = 256
+
+
+def decode_ts(ts_bytes):
+    ts1, ts2, ts3 = struct.unpack(">BBB", ts_bytes)
+    ts = ((ts1 << 16) + (ts2 << 8) + ts3)
+    ts_h = ts // (128 * 3600)
+    ts -= ts_h * 128 * 3600
+    ts_m = ts // (128 * 60)
+    ts -= ts_m * 128 * 60
+    ts_s = ts / 128
+    return ts_h, ts_m, ts_s
+
+
+def decode_date(date_bytes):
+    short, = struct.unpack(">H", date_bytes)
+    year = 2000 + (short >> 9)
+    days = short & 0x1FF
+    date = datetime.date(year, 1, 1)
+    delta = datetime.timedelta(days)
+    return date + delta
+
+
+# Records returned by packet_decoder.decode().  Fields named unkN hold bytes whose
+# meaning is unknown; str() gives the line decode_pcap.py prints for each.
+
+class packet(collections.namedtuple("packet", ["timestamp", "length", "flag", "src", "dst", "unk", "clock", "rpt",
+                                               "message"])):
+    """A packet.  clock is the gatekeeper's (hours, minutes, seconds) if it sent the packet, else rpt is set."""
+    __slots__ = ()
+
+    def __str__(self):
+        parts = [time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.timestamp)),
+                 f"len={self.length:02x} flag={self.flag:02x} src={self.src:08x} dst={self.dst:08x} {self.unk.hex()}"]
+        if self.clock is not None:
+            ts_h, ts_m, ts_s = self.clock
+            parts.append(f"ts={ts_h:02}:{ts_m:02}:{ts_s:06.3f}")
+        else:
+            parts.append(f"rpt={self.rpt[:1].hex()} {self.rpt[1:].hex()}")
+        parts.append(str(self.message) if self.message is not None else "")
+        return " ".join(parts)
+
+
+class flood(collections.namedtuple("flood", ["unk4", "hop", "unk7", "addr", "unk8", "kind", "body"])):
+    """A flood broadcast from a gatekeeper."""
+    __slots__ = ()
+
+    def __str__(self):
+        return (f"{self.unk4.hex()} hop={self.hop:02x} {self.unk7:02x} addr={self.addr:08x} {self.unk8:08x} "
+                f"len={self.kind:02x} {self.body}")
+
+
+class schedule(collections.namedtuple("schedule", ["prefix", "unk9", "days", "data"])):
+    __slots__ = ()
+
+    def __str__(self):
+        return f"{self.prefix.hex()} {self.unk9:02x} next_{self.days}_days={self.data.hex()}"
+
+
+class flood_date(collections.namedtuple("flood_date", ["prefix", "date"])):
+    __slots__ = ()
+
+    def __str__(self):
+        return f"{self.prefix.hex()} date={self.date}"
+
+
+class neighbours(collections.namedtuple("neighbours", ["prefix", "entries"])):
+    """Seven (meter, number) pairs; the meter's first bit is sometimes set, the number is 0x01-0x45."""
+    __slots__ = ()
+
+    def __str__(self):
+        return self.prefix.hex() + "".join(f" {meter.hex()} {number.hex()}" for meter, number in self.entries) + " "
+
+
+class gatekeeper(collections.namedtuple("gatekeeper", ["path", "body"])):
+    """A packet routed from a gatekeeper to a meter."""
+    __slots__ = ()
+
+    def __str__(self):
+        return f"path={self.path.hex()} {self.body}"
+
+
+class command(collections.namedtuple("command", ["header", "length", "unk12", "cmd", "cnt", "body"])):
+    __slots__ = ()
+
+    def __str__(self):
+        return (f"{self.header.hex()} len={self.length:02x} {self.unk12:02x} cmd={self.cmd:02x} cnt={self.cnt:02x} "
+                f"{self.body}")
+
+
+class hourly_request(collections.namedtuple("hourly_request", ["unk13", "first_hour"])):
+    __slots__ = ()
+
+    def __str__(self):
+        return f"{self.unk13:02x} first_hour={self.first_hour:05}"
+
+
+class path_setup(collections.namedtuple("path_setup", [
+        "unk14", "unk15", "unk16", "your_id", "par_id", "parent", "unk17", "n_children", "unk19", "level",
+        "unk21", "unk22", "unk23", "unk24", "unk25", "unk26", "unk27", "unk28", "unk29", "unk30", "date"])):
+    """Sent every six hours, apparently to build routes.  unk30 and date are only present in longer commands."""
+    __slots__ = ()
+
+    def __str__(self):
+        text = (f"{self.unk14:02x} {self.unk15:02x} {self.unk16:02x} id={self.your_id:02x} par_id={self.par_id:02x} "
+                f"parent={self.parent:08x} {self.unk17:02x} #child={self.n_children} {self.unk19:02x} lvl={self.level} "
+                f"{self.unk21:02x}{self.unk22:02x}{self.unk23:02x} {self.unk24:02x} {self.unk25:02x} {self.unk26:02x} "
+                f"{self.unk27:04x} {self.unk28:08x} {self.unk29:02x} ")
+        if self.date is not None:
+            text += f"{self.unk30:02x} date={self.date}"
+        return text
+
+
+class hourly_report(collections.namedtuple("hourly_report", [
+        "length", "unk10", "cmd", "ctr", "unk11", "flag2", "cur_hour", "last_hour", "n_hours", "readings", "data"])):
+    """Hourly usage from a meter, every six hours.
+
+    readings are in hundredths of a kWh, ending at last_hour; there are
+    n_hours of them unless the packet is too short to hold them all.
+    """
+    __slots__ = ()
+
+    def __str__(self):
+        return (f"len={self.length:02x} {self.unk10:02x} cmd={self.cmd:02x} ctr={self.ctr:02x} {self.unk11:02x} "
+                f"{self.flag2:02x} cur_hour={self.cur_hour:05} last_hour={self.last_hour:05} "
+                f"n_hour={self.n_hours:02} {self.data.hex()}")
+
+
+class hourly_status(collections.namedtuple("hourly_status", [
+        "length", "unk10", "cmd", "ctr", "unk11", "unk12", "unk13", "data"])):
+    """A shorter 0xce reply, without readings."""
+    __slots__ = ()
+
+    def __str__(self):
+        return (f"len={self.length:02x} {self.unk10:02x} cmd={self.cmd:02x} ctr={self.ctr:02x} {self.unk11:02x} "
+                f"{self.unk12:02x} {self.unk13:02x} {self.data.hex()}")
+
+
+class reply(collections.namedtuple("reply", ["length", "unk10", "cmd", "ctr", "data"])):
+    """A reply from a meter whose contents beyond the command are not decoded."""
+    __slots__ = ()
+
+    def __str__(self):
+        return f"len={self.length:02x} {self.unk10:02x} cmd={self.cmd:02x} ctr={self.ctr:02x} {self.data.hex()}"
+
+
+class unparsed(collections.namedtuple("unparsed", ["label", "data"])):
+    __slots__ = ()
+
+    def __str__(self):
+        return self.label + self.data.hex()
+
+
+# Commands are looked up by the direction of the packet and the command byte
+# (for flood broadcasts, the length byte that stands in for one).  The body
+# passed to a decoder starts after the command header: after the length byte
+# of a meter's reply, after the len, cmd and cnt bytes of a gatekeeper's
+# command, and after the len byte of a broadcast.
+FLOOD = "flood"
+FROM_GATEKEEPER = "gatekeeper"
+FROM_METER = "meter"
+
+command_decoder = collections.namedtuple("command_decoder", ["layout", "decode"])
+
+COMMANDS = {}
+
+
+def register_command(direction, cmd, layout):
+    """Decorator registering decode(layout, body, length) for a command.
+
+    layout is a struct format for the start of the body, compiled once and
+    passed to decode, which returns a record.  length is the command's
+    length byte.
+    """
+    def register(decode):
+        COMMANDS[direction, cmd] = command_decoder(struct.Struct(layout), decode)
+        return decode
+    return register
+
+
+def decode_command(direction, cmd, body, length):
+    """Return a record for a command's body, or None if there is no decoder for it."""
+    entry = COMMANDS.get((direction, cmd))
+    if entry is None:
+        return None
+    return entry.decode(entry.layout, body, length)
+
+
+@register_command(FLOOD, 0x00, ">4sBB")
+def _decode_schedule(layout, body, length):
+    prefix, unk9, days = layout.unpack_from(body)
+    return schedule(prefix, unk9, days, body[layout.size:])
+
+
+@register_command(FLOOD, 0x06, ">4s2s")
+def _decode_flood_date(layout, body, length):
+    prefix, date = layout.unpack_from(body)
+    return flood_date(prefix, decode_date(date))
+
+
+@register_command(FLOOD, 0x27, ">4s")
+def _decode_neighbours(layout, body, length):
+    # Sliced rather than unpacked, so that a short packet still shows what it has
+    return neighbours(body[0:4], [(body[4 + 5*x:8 + 5*x], body[8 + 5*x:9 + 5*x]) for x in range(7)])
+
+
+@register_command(FROM_GATEKEEPER, 0xce, ">BH")  # fetch hourly usage data, every 6 hours
+def _decode_hourly_request(layout, body, length):
+    return hourly_request(*layout.unpack_from(body))
+
+
+@register_command(FROM_GATEKEEPER, 0x23, ">BBBBBIBBBBBBBBBBHIB")  # path building stuff? every 6 hours
+def _decode_path_setup(layout, body, length):
+    fields = layout.unpack_from(body)
+    if length == 0x20:
+        return path_setup(*fields, body[layout.size], decode_date(body[layout.size + 1:layout.size + 3]))
+    return path_setup(*fields, None, None)
+
+
+_HOURLY_STATUS = struct.Struct(">BBBBBB")
+_READINGS = [struct.Struct(">" + "H" * n) for n in range(256)]
+
+
+@register_command(FROM_METER, 0xce, ">BBBBBHHB")  # hourly usage data, every 6 hours
+def _decode_hourly(layout, body, length):
+    if length >= 10:
+        unk10, cmd, ctr, unk11, flag2, cur_hour, last_hour, n_hours = layout.unpack_from(body)
+        readings = _READINGS[min(n_hours, (len(body) - layout.size) // 2)].unpack_from(body, layout.size)
+        # TODO: Get total meter reading
+        return hourly_report(length, unk10, cmd, ctr, unk11, flag2, cur_hour, last_hour, n_hours, readings,
+                             body[layout.size:])
+    if length >= 6:
+        return hourly_status(length, *_HOURLY_STATUS.unpack_from(body), body[_HOURLY_STATUS.size:])
+    return unparsed("todo=", body)
+
+
+@register_command(FROM_METER, 0x22, ">BBB")  # just an acknowledgement
+@register_command(FROM_METER, 0x23, ">BBB")  # path building stuff? every 6 hours
+@register_command(FROM_METER, 0x28, ">BBB")  # just an acknowledgement
+@register_command(FROM_METER, 0x6a, ">BBB")
+def _decode_reply(layout, body, length):
+    # TODO: Parse the rest of 0x23 and 0x6a
+    return reply(length, *layout.unpack_from(body), body[layout.size:])
+
+
+class hourly_readings:
+    """Readings of one meter, indexed by its 16-bit hour counter.
+
+    Storage is allocated CHUNK_HOURS at a time, only for the hours seen.
+    Hours without a reading are -1.
+    """
+
+    def __init__(self):
+        self.chunks = {}
+
+    def set(self, first_hour, readings):
+        readings = numpy.asarray(readings, dtype=numpy.int32)
+        hour = first_hour % HOURS
+        done = 0
+        while done < len(readings):
+            index, start = divmod(hour, CHUNK_HOURS)
+            n = min(CHUNK_HOURS - start, len(readings) - done)
+            chunk = self.chunks.get(index)
+            if chunk is None:
+                chunk = self.chunks[index] = numpy.full(CHUNK_HOURS, -1, dtype=numpy.int32)
+            chunk[start:start + n] = readings[done:done + n]
+            done += n
+            hour = (hour + n) % HOURS
+
+    def get(self, first_hour, last_hour):
+        """Return the readings from first_hour through last_hour, which may run past the wraparound."""
+        readings = numpy.full(last_hour - first_hour + 1, -1, dtype=numpy.int32)
+        for chunk_start in range(first_hour - first_hour % CHUNK_HOURS, last_hour + 1, CHUNK_HOURS):
+            chunk = self.chunks.get(chunk_start // CHUNK_HOURS % (HOURS // CHUNK_HOURS))
+            if chunk is None:
+                continue
+            start = max(first_hour, chunk_start)
+            end = min(last_hour + 1, chunk_start + CHUNK_HOURS)
+            readings[start - first_hour:end - first_hour] = chunk[start - chunk_start:end - chunk_start]
+        return readings
+
+    def update(self, other):
+        """Overwrite these readings with every reading present in other."""
+        for index, chunk in other.chunks.items():
+            mine = self.chunks.get(index)
+            if mine is None:
+                self.chunks[index] = chunk.copy()
+            else:
+                present = chunk >= 0
+                mine[present] = chunk[present]
+
+
+_FLOOD_HEADER = struct.Struct(">2sBBIIB")
+_COMMAND_HEADER = struct.Struct(">BBBB")
+
+
+class packet_decoder:
+    """Decodes Elster packets, as stored in pcap files, into records.
+
+    Along the way it collects each meter's hourly readings and the mesh
+    topology: the parent, gatekeeper and level of each meter, as announced
+    by gatekeepers.  A decoder can be merged into another that decoded
+    earlier packets, with the same result as decoding them all in one.
+    """
+
+    def __init__(self):
+        self.first_hour = {}
+        self.last_hour = {}
+        self.readings = {}
+        # The (first_hour, last_hour) of every report, in order, for replaying in merge()
+        self.spans = {}
+
+        self.parents = {}
+        self.gatekeepers = {}
+        self.levels = {}
+
+    def decode(self, timestamp, pkt):
+        """Return a packet record for pkt, which runs from the length byte to the end of the payload."""
+        pkt = bytes(pkt)
+        len1, flag1, src, dst = struct.unpack(">BBII", pkt[0:10])
+        flooded = dst == 0 and len1 >= 35
+        if (src & 0x80000000) or flooded:
+            clock, rpt = decode_ts(pkt[13:16]), None
+        else:
+            clock, rpt = None, pkt[13:16]
+
+        if flooded:
+            unk4, hop, unk7, addr, unk8, len2 = _FLOOD_HEADER.unpack_from(pkt, 16)
+            body = pkt[16 + _FLOOD_HEADER.size:]
+            body = decode_command(FLOOD, len2, body, len2) or unparsed("", body)
+            message = flood(unk4, hop, unk7, addr, unk8, len2, body)
+        elif src & 0x80000000:
+            message = self._decode_gatekeeper(pkt, src, dst)
+        else:
+            message = self._decode_meter(pkt, len1, src)
+        return packet(timestamp, len1, flag1, src, dst, pkt[10:13], clock, rpt, message)
+
+    def _decode_gatekeeper(self, pkt, src, dst):
+        if pkt[24] != 0x40:
+            return gatekeeper(pkt[16:24], unparsed("", pkt[24:]))
+        len4, unk12, cmd, cnt = _COMMAND_HEADER.unpack_from(pkt, 28)
+        body = decode_command(FROM_GATEKEEPER, cmd, pkt[32:], len4) or unparsed("", pkt[32:])
+        if isinstance(body, path_setup):
+            self._add_path(src, dst, body.parent, body.level)
+        return gatekeeper(pkt[16:24], command(pkt[24:28], len4, unk12, cmd, cnt, body))
+
+    def _decode_meter(self, pkt, len1, src):
+        if len(pkt) <= 16:
+            return None
+        len4 = pkt[16]
+        if len4 != len1 - 17:  # 1st byte of payload is normally a length
+            return unparsed("weird=", pkt[16:])  # this happens from time to time
+        if len(pkt) <= 18:
+            return unparsed(f"len={len4:02x} data=", pkt[17:])
+
+        body = decode_command(FROM_METER, pkt[18], pkt[17:], len4)
+        if body is None:
+            return unparsed("todo=", pkt[16:])  # TODO: Investigate these
+        if isinstance(body, hourly_report):
+            self.add_hourly(src, body.last_hour, body.readings)
+        return body
+
+    def _add_path(self, src, dst, parent, level):
+        self.parents[dst] = parent
+        if level == 2:
+            self.parents[parent] = src  # Fill this in now, in case we don't hear from parent
+
+        self.gatekeepers[dst] = src
+        if level >= 2:
+            self.gatekeepers[parent] = src  # Fill this in now, in case we don't hear from parent
+
+        self.levels[dst] = level
+        self.levels[parent] = level - 1
+        self.levels[src] = 0
+
+    def _add_span(self, meter, first_hour, last_hour):
+        if meter not in self.readings:
+            self.first_hour[meter] = first_hour
+            self.last_hour[meter] = last_hour
+            self.readings[meter] = hourly_readings()
+            self.spans[meter] = []
+        if (first_hour - self.first_hour[meter]) % HOURS > HOURS // 2:
+            self.first_hour[meter] = first_hour
+        if (last_hour - self.last_hour[meter]) % HOURS < HOURS // 2:
+            self.last_hour[meter] = last_hour
+        self.spans[meter].append((first_hour, last_hour))
+
+    def add_hourly(self, meter, last_hour, readings):
+        first_hour = last_hour - len(readings) + 1
+        self._add_span(meter, first_hour, last_hour)
+        self.readings[meter].set(first_hour, readings)
+
+    def meter_readings(self, meter):
+        """Return a meter's readings from its first hour through its last, -1 where missing."""
+        first_hour, last_hour = self.first_hour[meter], self.last_hour[meter]
+        if first_hour > last_hour:
+            last_hour += HOURS
+        return self.readings[meter].get(first_hour, last_hour)
+
+    def merge(self, other):
+        """Add the state of a decoder that decoded later packets, replaying its hour spans."""
+        for meter, spans in other.spans.items():
+            for first_hour, last_hour in spans:
+                self._add_span(meter, first_hour, last_hour)
+            self.readings[meter].update(other.readings[meter])
+        self.parents.update(other.parents)
+        self.gatekeepers.update(other.gatekeepers)
+        self.levels.update(other.levels)
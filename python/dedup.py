@@ -0,0 +1,54 @@
+#
+# Copyright 2026 Clayton Smith.
+#
+# This is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this software; see the file COPYING.  If not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street,
+# Boston, MA 02110-1301, USA.
+#
+
+import collections
+
+
+class dedup_cache:
+    """Remembers recently seen frames so that repeats on other channels can be dropped.
+
+    Entries expire ttl seconds after the first copy was seen, and the oldest
+    entries are evicted once max_entries is reached.
+    """
+
+    def __init__(self, ttl=2.0, max_entries=4096):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def check(self, key, now):
+        """Return True if key is new, False if it is a repeat of a recent frame."""
+        entries = self.entries
+        while entries:
+            first_seen = next(iter(entries.values()))
+            if now - first_seen < self.ttl and len(entries) < self.max_entries:
+                break
+            entries.popitem(last=False)
+
+        if key in entries:
+            self.hits += 1
+            return False
+        entries[key] = now
+        self.misses += 1
+        return True
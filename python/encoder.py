@@ -0,0 +1,115 @@
+#
+# Copyright 2026 Clayton Smith.
+#
+# This is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this software; see the file COPYING.  If not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street,
+# Boston, MA 02110-1301, USA.
+#
+
+import struct
+import numpy
+from .crc import crc_x25
+from .sync import PREAMBLE, SFD_1, SFD_2
+
+_CHIPS = numpy.array([[0, 0, 0, 0, 1, 1, 1, 1], [1, 1, 1, 1, 0, 0, 0, 0]], dtype=numpy.uint8)
+
+
+def build_packet(src, dst, payload=b"", flag=0x40, frame_type=1):
+    """Return a packet as packetize sees it, from the length field through the FCS."""
+    body = struct.pack(">BII", flag, src, dst) + bytes(payload)
+    if frame_type == 1:
+        length = len(body) + 1
+        if length > 255:
+            raise ValueError(f"Type 1 body too long: {len(body)} bytes")
+        pkt = bytes([length]) + body
+    elif frame_type == 2:
+        length = len(body) + 2
+        if length > 511:
+            raise ValueError(f"Type 2 body too long: {len(body)} bytes")
+        pkt = struct.pack(">H", length) + body
+    else:
+        raise ValueError(f"Unknown frame type: {frame_type}")
+    return pkt + crc_x25(pkt)
+
+
+def random_packet(rng, frame_type=1, payload_len=20):
+    """Return a packet from a random meter (src high bit clear) to a random gatekeeper, with a random payload."""
+    src = int(rng.integers(0, 0x80000000))
+    dst = int(rng.integers(0x80000000, 0x100000000))
+    payload = rng.integers(0, 256, payload_len, dtype=numpy.uint8).tobytes()
+    return build_packet(src, dst, payload, frame_type=frame_type)
+
+
+def frame_bits(pkt):
+    """Return the unpacked bits of a packet, with preamble and SFD, as the slicer emits them.
+
+    Like packetize, the frame type is taken from the first byte: type 1
+    lengths are at least 2, type 2 lengths have a high byte of 0 or 1.
+    """
+    data = numpy.frombuffer(pkt, dtype=numpy.uint8)
+    if data[0] >= 2:
+        chips = _CHIPS[numpy.unpackbits(data ^ 0x55)].ravel()
+        return numpy.concatenate([PREAMBLE, SFD_1, chips])
+    return numpy.concatenate([PREAMBLE, SFD_2, numpy.unpackbits(data ^ 0xaa)])
+
+
+def noise_bits(rng, n):
+    return rng.integers(0, 2, n, dtype=numpy.uint8)
+
+
+def flip_bits(rng, bits, rate):
+    """Return a copy of bits with each bit inverted with probability rate."""
+    return bits ^ (rng.random(len(bits)) < rate).astype(numpy.uint8)
+
+
+def soft_symbols(rng, bits, sigma):
+    """Map bits to +/-1 symbols and add Gaussian noise with standard deviation sigma."""
+    symbols = bits.astype(numpy.float32) * 2 - 1
+    return symbols + rng.normal(0, sigma, len(bits)).astype(numpy.float32)
+
+
+def channel_streams(rng, packets, num_channels=1, copies=1, gap=(200, 2000), bit_error_rate=0.0):
+    """Spread packets across channels as unpacked bit streams.
+
+    Packet i is sent on channels i, i + 1, ... i + copies - 1 (modulo
+    num_channels), as hopping meters repeat a packet.  Frames are separated
+    by random noise whose length is drawn uniformly from [gap[0], gap[1]),
+    and noise pads every stream to the same length, as channels of one
+    receiver run at the same rate.  Every bit is then inverted with
+    probability bit_error_rate.
+
+    Returns the streams and, per channel, the offsets at which each frame's
+    preamble starts and the packets sent there.
+    """
+    parts = [[] for _ in range(num_channels)]
+    lengths = [0] * num_channels
+    sent = [[] for _ in range(num_channels)]
+    for i, pkt in enumerate(packets):
+        bits = frame_bits(pkt)
+        for copy in range(copies):
+            channel = (i + copy) % num_channels
+            noise = noise_bits(rng, int(rng.integers(gap[0], gap[1])))
+            parts[channel] += [noise, bits]
+            sent[channel].append((lengths[channel] + len(noise), pkt))
+            lengths[channel] += len(noise) + len(bits)
+
+    total = max(lengths) + int(rng.integers(gap[0], gap[1]))
+    streams = []
+    for channel, channel_parts in enumerate(parts):
+        channel_parts.append(noise_bits(rng, total - lengths[channel]))
+        bits = numpy.concatenate(channel_parts)
+        if bit_error_rate:
+            bits = flip_bits(rng, bits, bit_error_rate)
+        streams.append(bits)
+    return streams, sent
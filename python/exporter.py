@@ -0,0 +1,196 @@
+#
+# Copyright 2026 Clayton Smith.
+#
+# This is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this software; see the file COPYING.  If not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street,
+# Boston, MA 02110-1301, USA.
+#
+
+import http.server
+import threading
+from .metrics import channel_stats
+
+_COUNTER_HELP = {
+    "bits_consumed": "Bits received.",
+    "preamble_hits": "Preambles detected.",
+    "sfd_1_hits": "Type 1 start-of-frame delimiters detected.",
+    "sfd_2_hits": "Type 2 start-of-frame delimiters detected.",
+    "length_rejects": "Frames rejected because of an invalid length.",
+    "header_rejects": "Captures abandoned because of an implausible header.",
+    "candidate_overflows": "Syncs ignored because every overlapping capture was in use.",
+    "manchester_rejects": "Frames rejected because of too many Manchester code violations.",
+    "crc_failures": "Frames rejected because of an invalid checksum.",
+    "valid_frames": "Frames with a valid checksum, including duplicates.",
+    "duplicates": "Valid frames already received on another channel.",
+}
+
+
+def _block_name(block):
+    try:
+        return block.alias()
+    except AttributeError:
+        return block.name()
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _exposition:
+    def __init__(self):
+        self.families = {}
+
+    def add(self, name, kind, help_text, labels, value):
+        family = self.families.setdefault(name, (kind, help_text, []))
+        label_str = ",".join(f'{key}="{value}"' for key, value in labels.items())
+        family[2].append(f"{name}{{{label_str}}} {_format_value(value)}" if label_str else f"{name} {_format_value(value)}")
+
+    def add_histogram(self, name, help_text, labels, hist):
+        family = self.families.setdefault(name, ("histogram", help_text, []))
+        label_str = "".join(f'{key}="{value}",' for key, value in labels.items())
+        cumulative = 0
+        for bound, count in zip(hist.bounds, hist.counts):
+            cumulative += count
+            family[2].append(f'{name}_bucket{{{label_str}le="{bound:g}"}} {cumulative}')
+        family[2].append(f'{name}_bucket{{{label_str}le="+Inf"}} {hist.count}')
+        family[2].append(f"{name}_sum{{{label_str.rstrip(',')}}} {_format_value(hist.sum)}")
+        family[2].append(f"{name}_count{{{label_str.rstrip(',')}}} {hist.count}")
+
+    def text(self):
+        lines = []
+        for name, (kind, help_text, samples) in self.families.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+def render(blocks):
+    """Return the Prometheus text exposition for the given blocks."""
+    out = _exposition()
+    try:
+        from gnuradio import gr
+        ticks_per_second = gr.high_res_timer_tps()
+    except (ImportError, AttributeError):
+        ticks_per_second = None
+
+    for block in blocks:
+        name = _block_name(block)
+
+        # Only populated when performance counters are enabled in the GNU Radio config
+        if ticks_per_second:
+            try:
+                work_time = block.pc_work_time_total() / ticks_per_second
+            except (AttributeError, RuntimeError):
+                pass
+            else:
+                out.add("gr_block_work_time_seconds_total", "counter",
+                        "Time spent in work according to GNU Radio performance counters.", {"block": name}, work_time)
+
+        if not hasattr(block, "stats"):
+            continue
+        for channel, stats in enumerate(block.stats):
+            labels = {"block": name, "channel": channel}
+            for field in channel_stats.FIELDS:
+                out.add(f"elster_{field}_total", "counter", _COUNTER_HELP[field], labels, getattr(stats, field))
+
+        labels = {"block": name}
+        out.add_histogram("elster_work_seconds", "Wall time of packetize general_work calls.", labels, block.work_time)
+        out.add_histogram("elster_work_items", "Items handed to packetize per general_work call.", labels, block.work_items)
+
+        pcap = block.pcap
+        out.add("elster_pcap_queue_depth", "gauge", "Packets waiting to be written to pcap.", labels, pcap.depth())
+        out.add("elster_pcap_queued_total", "counter", "Packets queued for the pcap writer.", labels, pcap.queued)
+        out.add("elster_pcap_written_total", "counter", "Packets written to pcap.", labels, pcap.written)
+        out.add("elster_pcap_dropped_total", "counter", "Packets dropped because the pcap queue was full or closed.", labels, pcap.dropped)
+        out.add("elster_pcap_write_errors_total", "counter", "Failed pcap writes and flushes.", labels, pcap.write_errors)
+
+        if block.dedup is not None:
+            lookups = block.dedup.hits + block.dedup.misses
+            out.add("elster_dedup_hits_total", "counter", "Frames found in the duplicate cache.", labels, block.dedup.hits)
+            out.add("elster_dedup_lookups_total", "counter", "Frames looked up in the duplicate cache.", labels, lookups)
+            out.add("elster_dedup_hit_ratio", "gauge", "Fraction of frames that were duplicates.", labels,
+                    block.dedup.hits / lookups if lookups else 0.0)
+            out.add("elster_dedup_entries", "gauge", "Frames held in the duplicate cache.", labels, len(block.dedup))
+
+    return out.text()
+
+
+class metrics_exporter:
+    """Serves Prometheus metrics for a set of blocks over HTTP.
+
+    Any block can be given, or added later with add_blocks(); blocks other
+    than packetize only report their GNU Radio work time, and only when
+    performance counters are enabled.
+
+    A timer thread renders a snapshot every interval seconds; requests are
+    answered from that snapshot, so scrapes never touch the flowgraph.
+    close() stops serving; start() serves again on the same port.
+    """
+
+    def __init__(self, blocks, port=9464, address="127.0.0.1", interval=5.0):
+        self.blocks = list(blocks)
+        self.port = port
+        self.address = address
+        self.interval = interval
+        self.server = None
+        self.start()
+
+    def start(self):
+        if self.server is not None:
+            return
+        self.snapshot = render(self.blocks).encode()
+        self.stopping = threading.Event()
+
+        exporter = self
+
+        class handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = exporter.snapshot
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        # With port 0, a restart keeps the port picked the first time
+        self.server = http.server.ThreadingHTTPServer((self.address, self.port), handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self.server_thread = threading.Thread(target=self.server.serve_forever, name="metrics_exporter http", daemon=True)
+        self.refresh_thread = threading.Thread(target=self._refresh, name="metrics_exporter refresh", daemon=True)
+        self.server_thread.start()
+        self.refresh_thread.start()
+
+    def add_blocks(self, blocks):
+        self.blocks += blocks
+
+    def close(self):
+        if self.server is None:
+            return
+        self.stopping.set()
+        self.refresh_thread.join()
+        self.server.shutdown()
+        self.server.server_close()
+        self.server = None
+
+    def _refresh(self):
+        while not self.stopping.wait(self.interval):
+            self.snapshot = render(self.blocks).encode()
@@ -0,0 +1,361 @@
+#
+# Copyright 2026 Clayton Smith.
+#
+# This is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this software; see the file COPYING.  If not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street,
+# Boston, MA 02110-1301, USA.
+#
+
+import collections
+import struct
+import numpy
+from .capture import capture_buffer
+from .crc import check_crc_x25
+from .manchester import decode_manchester, decode_length_1, decode_length_2
+from .manchester import decode_manchester_soft, decode_length_1_soft, decode_length_2_soft
+from .metrics import channel_stats
+from .sync import find_sync, PEAK_RUN, PREAMBLE_PERIOD, SYNC_LEN
+
+# A sync word followed by a complete length field
+SEARCH_WINDOW = SYNC_LEN + 64
+
+# Bits holding the length, flag and addresses, and the smallest length a frame can
+# have: its length field, flag and addresses counted in the length
+HEADER_BITS = {1: 10 * 64, 2: 11 * 8}
+MIN_LENGTH = {1: 10, 2: 11}
+
+# Set in gatekeeper addresses, clear in meter addresses
+GATEKEEPER_BIT = 0x80000000
+
+# offset is the index of the frame's first preamble bit among all bits passed to work()
+frame = collections.namedtuple("frame", ["data", "frame_type", "manchester_errors", "offset"])
+
+
+def check_header(header, valid_flags=None):
+    """Default header check: reject headers that cannot start a genuine frame.
+
+    header runs from the length field through the destination address.  A
+    device never addresses itself, and every frame has a gatekeeper (an
+    address with the high bit set) at one end or is a flood broadcast to
+    address 0.  If valid_flags is given, the flag byte must be one of them.
+    """
+    len_bytes = 1 if header[0] >= 2 else 2
+    flag, src, dst = struct.unpack(">BII", header[len_bytes:len_bytes + 9])
+    if valid_flags is not None and flag not in valid_flags:
+        return False
+    if src == dst:
+        return False
+    return bool((src | dst) & GATEKEEPER_BIT) or dst == 0
+
+
+def check_length(pkt):
+    """Return whether a frame's length field matches its size, including the CRC.
+
+    Every frame carries at least a flag byte and the source and destination
+    addresses after its length field.
+    """
+    if pkt[0] >= 2:
+        len_bytes, length = 1, pkt[0]
+    else:
+        len_bytes, length = 2, (pkt[0] << 8) | pkt[1]
+    return length + 2 == len(pkt) and length >= len_bytes + 9
+
+
+class framer:
+    """Streaming frame extractor for one channel of bits.
+
+    Every call to work() accepts all of the bits it is given.  While searching,
+    the bits that cannot yet start a complete search window are kept and
+    prepended to the next call, so each sync offset is tested exactly once.
+    With packed=True, each input byte carries 8 bits, most significant first.
+    With soft=True, the input is soft symbols (positive for a 1 bit) and
+    find_sync must accept them, e.g. sync.find_sync_soft.  find_sync is
+    called with return_preambles=True.
+
+    Frames whose length is too short for their type are never captured.
+    Once the flag and addresses have arrived, they are passed to
+    header_check (if not None); when it fails, the capture is abandoned
+    and the search resumes at the offset after the rejected sync.
+    """
+
+    def __init__(self, find_sync=find_sync, packed=False, soft=False, stats=None, header_check=check_header):
+        if packed and soft:
+            raise ValueError("Soft symbols cannot be packed.")
+        self.find_sync = find_sync
+        self.header_check = header_check
+        self.packed = packed
+        self.soft = soft
+        self.stats = channel_stats() if stats is None else stats
+        dtype = numpy.float32 if soft else numpy.uint8
+        self.history = numpy.zeros(0, dtype=dtype)
+        self.capture = capture_buffer(dtype=dtype)
+        self.frame_type = 0
+        self.frame_offset = 0
+        self.header_bits = 0
+        self.bits_seen = 0
+        # Soft sync candidates are local peaks, so offsets near either end of
+        # the history need neighbouring offsets to be checked against
+        self.margin = PEAK_RUN if soft else 0
+        # Tested offsets kept before the next search, so that a preamble run
+        # continuing from the previous call is not counted again
+        self.lookback = max(self.margin, PREAMBLE_PERIOD)
+        self.context = 0
+        # Bits from just after the current sync up to the capture, to search again if it is abandoned
+        self.resume = self.history
+        self.resume_context = 0
+
+    def items_needed(self):
+        if self.packed:
+            return -(-self.bits_needed() // 8)
+        return self.bits_needed()
+
+    def bits_needed(self):
+        if self.capture.remaining > 0:
+            return self.capture.remaining
+        return self._search_bits_needed()
+
+    def _search_bits_needed(self):
+        # Enough for a full search window, and never fewer than SEARCH_WINDOW new offsets per search
+        return max(SEARCH_WINDOW + self.margin + self.context - len(self.history), SEARCH_WINDOW)
+
+    def work(self, bits):
+        if self.packed:
+            # Frames start at arbitrary bit offsets, so work on the unpacked bits of each call
+            bits = numpy.unpackbits(bits)
+        self.stats.bits_consumed += len(bits)
+        self.bits_seen += len(bits)
+        frames = []
+        while len(bits):
+            if self.capture.remaining > 0:
+                if self.header_bits:
+                    bits = bits[self.capture.extend(bits[:self.header_bits - self.capture.fill]):]
+                    if self.capture.fill < self.header_bits:
+                        continue
+                    self.header_bits = 0
+                    header, _ = self._decode_bytes(self.capture.bits(), self.frame_type)
+                    if not self.header_check(header):
+                        self.stats.header_rejects += 1
+                        self._rewind()
+                        continue
+                bits = bits[self.capture.extend(bits):]
+                if self.capture.remaining == 0:
+                    frames.append(self._decode())
+                    self.capture.reset()
+            else:
+                bits = self._search(bits)
+        return frames
+
+    def _search(self, bits):
+        # Returns the bits following a sync and length field, or nothing if no sync was found
+        origin = self.bits_seen - len(bits) - len(self.history)
+        # Bits joined to the history are a copy of our own; the caller's bits must be copied to be kept
+        joined = len(self.history) > 0
+        if joined:
+            bits = numpy.concatenate([self.history, bits])
+        if len(bits) < SEARCH_WINDOW + self.margin + self.context:
+            self.history = bits if joined else numpy.array(bits)
+            return bits[:0]
+
+        # Offsets from self.context up to end are tested in this call
+        end = len(bits) - SEARCH_WINDOW + 1 - self.margin
+        found = self._find(bits, end)
+        if len(found[0]):
+            for sync_offset, frame_type, length in self._syncs(bits, found):
+                start = sync_offset + SYNC_LEN
+                self.capture.start((length + 2) * (64 if frame_type == 1 else 8))
+                self.frame_type = frame_type
+                self.frame_offset = origin + sync_offset
+                if self.header_check is not None:
+                    self.header_bits = HEADER_BITS[frame_type]
+                    resume = max(sync_offset + 1 - self.lookback, 0)
+                    self.resume = numpy.array(bits[resume:start])
+                    self.resume_context = sync_offset + 1 - resume
+                self.history = self.history[:0]
+                self.context = 0
+                return bits[start:]
+        else:
+            # Usually there is no sync at all
+            self.stats.preamble_hits += len(found[2])
+
+        # Keep up to lookback tested offsets as left context for the next call
+        start = max(end - self.lookback, 0)
+        self.history = bits[start:] if joined else numpy.array(bits[start:])
+        self.context = end - start
+        return bits[:0]
+
+    def _find(self, bits, end):
+        # Offsets, SFD types and preamble starts in [self.context, end); the last 64 bits are a length field
+        return self.find_sync(bits[:len(bits) - 64], first=self.context, last=end, return_preambles=True)
+
+    def _syncs(self, bits, found):
+        # Yields (offset, frame type, length) for each sync found with a usable length.
+        # Offsets after a sync that is taken are searched again, so preambles are counted as the syncs are yielded.
+        offsets, types, preambles = found
+        counted = 0
+        for sync_offset, sfd in zip(offsets.tolist(), types.tolist()):
+            if sfd == 1:
+                self.stats.sfd_1_hits += 1
+            else:
+                self.stats.sfd_2_hits += 1
+            start = sync_offset + SYNC_LEN
+            if sfd == 1:
+                if self.soft:
+                    length, _ = decode_length_1_soft(bits[start:])
+                else:
+                    length, _ = decode_length_1(bits[start:])
+            else:
+                if self.soft:
+                    length = decode_length_2_soft(bits[start:])
+                else:
+                    length = decode_length_2(bits[start:])
+            if length < MIN_LENGTH[sfd] or length >= 512:
+                self.stats.length_rejects += 1
+                continue
+            preamble_hits = int(numpy.searchsorted(preambles, sync_offset, "right"))
+            self.stats.preamble_hits += preamble_hits - counted
+            counted = preamble_hits
+            yield sync_offset, sfd, length
+        self.stats.preamble_hits += len(preambles) - counted
+
+    def _rewind(self):
+        # The next _search sees the bits after the rejected sync followed by those still to come
+        self.history = numpy.concatenate([self.resume, self.capture.bits()])
+        self.context = self.resume_context
+        self.capture.reset()
+
+    def _decode_bytes(self, bits, frame_type):
+        if frame_type == 1:
+            if self.soft:
+                data, errors = decode_manchester_soft(bits)
+            else:
+                data, errors = decode_manchester(bits)
+            return (data ^ 0x55).tobytes(), errors
+        if self.soft:
+            bits = bits > 0
+        return (numpy.packbits(bits) ^ 0xaa).tobytes(), 0
+
+    def _decode(self):
+        data, errors = self._decode_bytes(self.capture.bits(), self.frame_type)
+        return frame(data, self.frame_type, errors, self.frame_offset)
+
+
+class _candidate:
+    __slots__ = ("offset", "frame_type", "header_bits", "capture")
+
+
+class overlap_framer(framer):
+    """Frame extractor that keeps searching while frames are being captured.
+
+    Every sync found starts a candidate capture, up to max_candidates at a
+    time; syncs beyond that are counted in candidate_overflows and ignored.
+    Candidates are advanced through the stream together, and when one
+    completes with a valid CRC, the others overlapping it are abandoned and
+    no new ones are started inside it.  Frames are returned in the order
+    they complete.
+    """
+
+    def __init__(self, find_sync=find_sync, packed=False, soft=False, stats=None, header_check=check_header,
+                 max_candidates=4):
+        super().__init__(find_sync, packed, soft, stats, header_check)
+        self.pool = [capture_buffer(dtype=self.capture.buffer.dtype) for _ in range(max_candidates)]
+        self.candidates = []
+        self.confirmed_end = 0
+
+    def bits_needed(self):
+        return min([self._search_bits_needed()] + [candidate.capture.remaining for candidate in self.candidates])
+
+    def work(self, bits):
+        if self.packed:
+            bits = numpy.unpackbits(bits)
+        self.stats.bits_consumed += len(bits)
+        self.bits_seen += len(bits)
+        frames = []
+
+        origin = self.bits_seen - len(bits) - len(self.history)
+        joined = len(self.history) > 0
+        if joined:
+            bits = numpy.concatenate([self.history, bits])
+        if len(bits) < SEARCH_WINDOW + self.margin + self.context:
+            self.history = bits if joined else numpy.array(bits)
+            self._advance(bits, origin, self.bits_seen, frames)
+            return frames
+
+        end = len(bits) - SEARCH_WINDOW + 1 - self.margin
+        for sync_offset, frame_type, length in self._syncs(bits, self._find(bits, end)):
+            offset = origin + sync_offset
+            # Let earlier candidates complete first, so that a valid one can veto this sync
+            self._advance(bits, origin, offset, frames)
+            if offset < self.confirmed_end:
+                continue
+            if not self.pool:
+                self.stats.candidate_overflows += 1
+                continue
+            candidate = _candidate()
+            candidate.offset = offset
+            candidate.frame_type = frame_type
+            candidate.header_bits = HEADER_BITS[frame_type] if self.header_check is not None else 0
+            candidate.capture = self.pool.pop()
+            candidate.capture.start((length + 2) * (64 if frame_type == 1 else 8))
+            self.candidates.append(candidate)
+        self._advance(bits, origin, self.bits_seen, frames)
+
+        start = max(end - self.lookback, 0)
+        self.history = bits[start:] if joined else numpy.array(bits[start:])
+        self.context = end - start
+        return frames
+
+    def _advance(self, bits, origin, target, frames):
+        # Feeds every candidate the bits before absolute position target, handling
+        # header checks and completions in stream order; bits[0] is at origin
+        while self.candidates:
+            candidate = min(self.candidates, key=self._next_event)
+            event = self._next_event(candidate)
+            if event > target:
+                break
+            self._extend(candidate, bits, origin, event)
+            if candidate.header_bits:
+                candidate.header_bits = 0
+                header, _ = self._decode_bytes(candidate.capture.bits(), candidate.frame_type)
+                if not self.header_check(header):
+                    self.stats.header_rejects += 1
+                    self._release(candidate)
+                continue
+
+            data, errors = self._decode_bytes(candidate.capture.bits(), candidate.frame_type)
+            self._release(candidate)
+            if check_crc_x25([data])[0]:
+                self.confirmed_end = max(self.confirmed_end, event)
+                for other in list(self.candidates):
+                    if other.offset < event:
+                        self._release(other)
+            frames.append(frame(data, candidate.frame_type, errors, candidate.offset))
+
+        for candidate in self.candidates:
+            self._extend(candidate, bits, origin, target)
+
+    @staticmethod
+    def _next_event(candidate):
+        # Position at which the header is complete, or else the frame
+        return candidate.offset + SYNC_LEN + (candidate.header_bits or candidate.capture.size)
+
+    @staticmethod
+    def _extend(candidate, bits, origin, target):
+        position = candidate.offset + SYNC_LEN + candidate.capture.fill
+        if target > position:
+            candidate.capture.extend(bits[position - origin:target - origin])
+
+    def _release(self, candidate):
+        self.candidates.remove(candidate)
+        candidate.capture.reset()
+        self.pool.append(candidate.capture)
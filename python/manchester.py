@@ -0,0 +1,71 @@
+#
+# Copyright 2026 Clayton Smith.
+#
+# This is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this software; see the file COPYING.  If not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street,
+# Boston, MA 02110-1301, USA.
+#
+
+import numpy
+
+# Each Manchester-coded bit spans 8 input bits: four high then four low for a 1, the reverse for a 0.
+# Indexed by those 8 input bits packed into a byte.
+_high_ones = numpy.array([bin(b >> 4).count("1") for b in range(256)])
+_low_ones = numpy.array([bin(b & 0xf).count("1") for b in range(256)])
+MANCHESTER = (_high_ones > _low_ones).astype(numpy.uint8)
+# Bytes whose halves have equal weight (e.g. 0x00, 0xff, 0x3c) carry no decision
+VIOLATION = (_high_ones == _low_ones).astype(numpy.uint8)
+
+
+def decode_manchester(bits):
+    """Decode unpacked Manchester bits (a multiple of 64) into bytes.
+
+    Returns the decoded bytes as a uint8 array and the number of code
+    violations seen.
+    """
+    chips = numpy.packbits(bits)
+    return numpy.packbits(MANCHESTER[chips]), int(VIOLATION[chips].sum())
+
+
+def decode_length_1(bits):
+    """Decode the whitened 8-bit length of a type 1 frame from its first 64 bits."""
+    length, errors = decode_manchester(bits[:64])
+    return int(length[0]) ^ 0x55, errors
+
+
+def decode_length_2(bits):
+    """Decode the whitened 16-bit length of a type 2 frame from its first 16 bits."""
+    high, low = numpy.packbits(bits[:16])
+    return ((int(high) << 8) | int(low)) ^ 0xaaaa
+
+
+def decode_manchester_soft(symbols):
+    """Decode soft Manchester symbols (a multiple of 64) into bytes.
+
+    Each bit is decided by comparing the energy of its two halves.  A code
+    violation is counted when both halves have the same sign.
+    """
+    halves = symbols.reshape(-1, 2, 4).sum(axis=2)
+    bits = halves[:, 0] > halves[:, 1]
+    violations = (halves[:, 0] > 0) == (halves[:, 1] > 0)
+    return numpy.packbits(bits), int(violations.sum())
+
+
+def decode_length_1_soft(symbols):
+    length, errors = decode_manchester_soft(symbols[:64])
+    return int(length[0]) ^ 0x55, errors
+
+
+def decode_length_2_soft(symbols):
+    return decode_length_2(symbols[:16] > 0)
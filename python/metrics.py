@@ -0,0 +1,101 @@
+#
+# Copyright 2026 Clayton Smith.
+#
+# This is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this software; see the file COPYING.  If not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street,
+# Boston, MA 02110-1301, USA.
+#
+
+import bisect
+import json
+import os
+import threading
+
+
+class channel_stats:
+    """Counters describing what happened to the bits of one channel."""
+
+    FIELDS = ("bits_consumed", "preamble_hits", "sfd_1_hits", "sfd_2_hits", "length_rejects", "header_rejects",
+              "candidate_overflows", "manchester_rejects", "crc_failures", "valid_frames", "duplicates")
+    __slots__ = FIELDS
+
+    def __init__(self):
+        for field in self.FIELDS:
+            setattr(self, field, 0)
+
+    def as_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+
+class histogram:
+    """Counts of observations falling at or below each bound, plus an overflow bucket."""
+
+    def __init__(self, bounds):
+        self.bounds = list(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0
+
+    def add(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def as_dict(self):
+        return {"bounds": self.bounds, "counts": list(self.counts), "count": self.count, "sum": self.sum}
+
+
+# general_work wall time in seconds, from 10 us to about 1.3 s
+WORK_TIME_BOUNDS = [10e-6 * 2**i for i in range(18)]
+# Items per general_work call, from 1 to 64 Ki
+ITEMS_BOUNDS = [2**i for i in range(17)]
+
+
+class snapshot_writer:
+    """Periodically writes snapshot() as JSON, replacing the file atomically.
+
+    close() writes a last snapshot and stops; start() carries on again.
+    """
+
+    def __init__(self, filename, interval, snapshot):
+        self.filename = filename
+        self.interval = interval
+        self.snapshot = snapshot
+        self.thread = None
+        self.start()
+
+    def start(self):
+        if self.thread is not None:
+            return
+        self.stopping = threading.Event()
+        self.thread = threading.Thread(target=self._run, name=f"snapshot_writer {self.filename}", daemon=True)
+        self.thread.start()
+
+    def write(self):
+        tmp_filename = self.filename + ".tmp"
+        with open(tmp_filename, "w") as f:
+            json.dump(self.snapshot(), f, indent=1)
+        os.replace(tmp_filename, self.filename)
+
+    def close(self):
+        if self.thread is None:
+            return
+        self.stopping.set()
+        self.thread.join()
+        self.thread = None
+        self.write()
+
+    def _run(self):
+        while not self.stopping.wait(self.interval):
+            self.write()
@@ -1,7 +1,7 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 #
-# Copyright 2013, 2014, 2019 Clayton Smith.
+# Copyright 2013, 2014, 2019, 2026 Clayton Smith.
 #
 # This is free software; you can redistribute it and/or modify
 # it under the terms of the GNU General Public License as published by
@@ -20,59 +20,139 @@
 #
 
 import datetime
-import os.path
+import functools
 import struct
 import time
 import numpy
+import pmt
 from gnuradio import gr
+from .crc import check_crc_x25
+from .decoder import decode_command, hourly_report, FROM_METER
+from .dedup import dedup_cache
+from .exporter import metrics_exporter
+from .framer import check_header, check_length, framer, overlap_framer
+from .metrics import channel_stats, histogram, snapshot_writer, ITEMS_BOUNDS, WORK_TIME_BOUNDS
+from .pcap import rotating_pcap_writer
+from .sync import find_sync, find_sync_reference, find_sync_soft
 
 
 class packetize(gr.basic_block):
-    preamble = numpy.repeat(numpy.array([1, 0]*16, dtype=numpy.uint8), 4).tobytes()
-    sfd_1 = numpy.repeat(numpy.array([0, 1, 0, 1, 0, 1, 0, 1, 1, 0, 1, 0, 0, 1, 0, 1, 1, 0, 0, 1, 1, 0, 1, 0, 1, 0, 1, 0, 0, 1, 1, 0], dtype=numpy.uint8), 4).tobytes()
-    sfd_2 = numpy.repeat(numpy.array([1, 0, 0, 1, 1, 0, 1, 0, 1, 0, 0, 1, 1, 0, 0, 1, 1, 0, 1, 0, 0, 1, 1, 0, 0, 1, 0, 1, 0, 1, 1, 0], dtype=numpy.uint8), 4).tobytes()
-    manchester = [int(f"{b:08b}"[:4].count("1") > f"{b:08b}"[4:].count("1")) for b in range(256)]
-
-    def __init__(self, num_inputs):
+    def __init__(self, num_inputs, max_sync_errors=0, reference_sync=False, max_manchester_errors=None,
+                 pcap_queue_size=1024, pcap_flush_packets=1, pcap_flush_interval=0.0, print_mode="full",
+                 suppress_duplicates=True, dedup_ttl=2.0, dedup_size=4096, packed=False,
+                 soft=False, sync_threshold=0.8, metrics_file="", metrics_interval=10.0,
+                 metrics_port=0, metrics_address="127.0.0.1", pcap_directory=".",
+                 pcap_template=None, pcap_rotate_bytes=0, pcap_rotate_seconds=0.0,
+                 pcap_format="pcap", bit_rate=0.0, start_time=0.0, valid_flags=None, max_candidates=1,
+                 check_headers=True):
         gr.basic_block.__init__(self,
                                 name="packetize",
-                                in_sig=[numpy.uint8]*num_inputs,
+                                in_sig=[numpy.float32 if soft else numpy.uint8]*num_inputs,
                                 out_sig=None)
+        self.message_port_register_out(pmt.intern("pdus"))
+
+        if print_mode not in ("off", "summary", "full"):
+            raise ValueError(f"Unknown print mode: {print_mode}")
+        if pcap_format not in ("pcap", "pcapng"):
+            raise ValueError(f"Unknown pcap format: {pcap_format}")
+        if valid_flags is not None and not check_headers:
+            raise ValueError("Valid flag bytes require header checking.")
+        self.print_mode = print_mode
+
+        if soft:
+            if reference_sync:
+                raise ValueError("Reference sync search requires hard bits.")
+            sync = functools.partial(find_sync_soft, threshold=sync_threshold)
+        elif reference_sync:
+            if max_sync_errors != 0:
+                raise ValueError("Reference sync search only supports exact matches.")
+            sync = find_sync_reference
+        else:
+            sync = functools.partial(find_sync, max_errors=max_sync_errors)
+        self.stats = [channel_stats() for _ in range(num_inputs)]
+        self.work_time = histogram(WORK_TIME_BOUNDS)
+        self.work_items = histogram(ITEMS_BOUNDS)
+        # Without header checks, every sync is followed through to its CRC
+        header_check = functools.partial(check_header, valid_flags=valid_flags) if check_headers else None
+        if max_candidates > 1:
+            self.framers = [overlap_framer(sync, packed, soft, stats, header_check, max_candidates) for stats in self.stats]
+        else:
+            self.framers = [framer(sync, packed, soft, stats, header_check) for stats in self.stats]
+        self.bits_per_item = 8 if packed else 1
+        self.max_request = 80 if packed else 640
+        self.max_manchester_errors = max_manchester_errors
+
+        # With a bit rate, frames are stamped with the time of their first preamble
+        # bit, counted from the latest rx_time tag on their channel, or else from
+        # start_time (or the first call to general_work) at the first item
+        self.bit_rate = bit_rate
+        self.start_time = start_time
+        self.time_base = None
+
+        # Packets are repeated on several hopping channels; keep only the first copy
+        self.dedup = dedup_cache(dedup_ttl, dedup_size) if suppress_duplicates else None
+
+        self.pcap = rotating_pcap_writer(pcap_directory, pcap_template, pcap_rotate_bytes, pcap_rotate_seconds,
+                                         queue_size=pcap_queue_size, flush_packets=pcap_flush_packets,
+                                         flush_interval=pcap_flush_interval,
+                                         pcapng=pcap_format == "pcapng", num_interfaces=num_inputs)
+
+        self.metrics = snapshot_writer(metrics_file, metrics_interval, self.metrics_snapshot) if metrics_file else None
+        self.exporter = metrics_exporter([self], metrics_port, metrics_address, metrics_interval) if metrics_port else None
+
+    def start(self):
+        # GNU Radio calls start() and stop() on every run, so stop() must not be final
+        self.pcap.start()
+        if self.metrics is not None:
+            self.metrics.start()
+        if self.exporter is not None:
+            self.exporter.start()
+        return True
+
+    def stop(self):
+        self.pcap.close()
+        if self.metrics is not None:
+            self.metrics.close()
+        if self.exporter is not None:
+            self.exporter.close()
+        return True
+
+    def export_blocks(self, blocks):
+        """Serve the GNU Radio work time of other blocks on metrics_port too."""
+        if self.exporter is None:
+            raise ValueError("Exporting blocks requires a metrics port.")
+        self.exporter.add_blocks(blocks)
+
+    def pcap_queued(self):
+        return self.pcap.queued
+
+    def pcap_written(self):
+        return self.pcap.written
+
+    def pcap_dropped(self):
+        return self.pcap.dropped
 
-        i = 1
-        filename = f"elster-{i:03}.pcap"
-        while os.path.exists(filename):
-            i += 1
-            filename = f"elster-{i:03}.pcap"
-        self.file = open(filename, "wb")
-        self.linktype = 147
-        self.file.write(struct.pack("IHHIIII", 0xa1b2c3d4, 2, 4, 0, 0, 32767, self.linktype))
-        self.file.flush()
-
-        self.packet_bits = [numpy.array([], dtype=numpy.uint8) for _ in range(num_inputs)]
-        self.packet_type = [0] * num_inputs
-        self.bits_remaining = [0] * num_inputs
-
-    def __del__(self):
-        self.file.close()
-
-    def crc_x25(self, message):
-        poly = 0x8408
-        reg = 0xffff
-        for byte in message:
-            mask = 0x01
-            while mask < 0x100:
-                lowbit = reg & 1
-                reg >>= 1
-                if byte & mask:
-                    lowbit ^= 1
-                mask <<= 1
-                if lowbit:
-                    reg ^= poly
-        reg ^= 0xffff
-        return bytes([reg & 0xff, reg >> 8])
-
-    def process_packet(self, channel, pkt):
+    def duplicate_counts(self):
+        return [stats.duplicates for stats in self.stats]
+
+    def channel_counters(self, channel):
+        return self.stats[channel].as_dict()
+
+    def metrics_snapshot(self):
+        return {
+            "time": time.time(),
+            "channels": [stats.as_dict() for stats in self.stats],
+            "work_time": self.work_time.as_dict(),
+            "work_items": self.work_items.as_dict(),
+            "pcap": {"queued": self.pcap.queued, "written": self.pcap.written,
+                     "dropped": self.pcap.dropped, "depth": self.pcap.depth()},
+        }
+
+    def _frame_time(self, channel, offset):
+        bit_offset, seconds = self.time_base[channel]
+        return seconds + (offset - bit_offset) / self.bit_rate
+
+    def process_packet(self, channel, pkt, crc_ok, manchester_errors=0, timestamp=None):
         if pkt[0] >= 2:
             len_bytes = 1
             length = pkt[0]
@@ -82,106 +162,108 @@ class packetize(gr.basic_block):
             length = (pkt[0] << 8) | pkt[1]
             cmd_start = 20
 
-        if length + 2 != len(pkt):
-            print("Invalid packet length.")
+        if not check_length(pkt):
+            self.stats[channel].length_rejects += 1
+            if self.print_mode == "full":
+                print("Invalid packet length.")
             return
-        if self.crc_x25(pkt[0:length]) != pkt[length:length+2]:
-            print("Invalid checksum.")
-            return
-
-        caplen = len(pkt)-2
-        wirelen = caplen
-        now = time.time()
-        sec = int(now)
-        usec = int(round((now-sec)*1000000))
-        self.file.write(struct.pack("IIII", sec, usec, caplen, wirelen))
-        self.file.write(pkt[0:-2])
-        self.file.flush()
 
+        now = time.time() if timestamp is None else timestamp
+        frame_type = 1 if len_bytes == 1 else 2
         payload = pkt[len_bytes:-2]
         flag1, src, dst = struct.unpack(">BII", payload[0:9])
-        time_str = datetime.datetime.now().strftime("%H:%M:%S.%f")
+        if crc_ok:
+            self.stats[channel].valid_frames += 1
+            if self.dedup is not None and not self.dedup.check(pkt, now):
+                self.stats[channel].duplicates += 1
+                return
+
+        meta = pmt.make_dict()
+        meta = pmt.dict_add(meta, pmt.intern("channel"), pmt.from_long(channel))
+        meta = pmt.dict_add(meta, pmt.intern("frame_type"), pmt.from_long(frame_type))
+        meta = pmt.dict_add(meta, pmt.intern("timestamp"), pmt.from_double(now))
+        meta = pmt.dict_add(meta, pmt.intern("crc_ok"), pmt.from_bool(bool(crc_ok)))
+        meta = pmt.dict_add(meta, pmt.intern("manchester_errors"), pmt.from_long(manchester_errors))
+        meta = pmt.dict_add(meta, pmt.intern("src"), pmt.from_uint64(src))
+        meta = pmt.dict_add(meta, pmt.intern("dst"), pmt.from_uint64(dst))
+        data = pmt.init_u8vector(length, list(pkt[0:-2]))
+        self.message_port_pub(pmt.intern("pdus"), pmt.cons(meta, data))
+
+        if not crc_ok:
+            self.stats[channel].crc_failures += 1
+            if self.pcap.pcapng:
+                # pcapng can flag the frame as damaged, so keep it for offline analysis
+                self.pcap.write(now, pkt[0:-2], channel, f"type={frame_type} crc=bad manchester_errors={manchester_errors}", False)
+            if self.print_mode == "full":
+                print("Invalid checksum.")
+            return
+
+        self.pcap.write(now, pkt[0:-2], channel, f"type={frame_type} crc=ok manchester_errors={manchester_errors}")
+
+        if self.print_mode == "off":
+            return
+        time_str = datetime.datetime.fromtimestamp(now).strftime("%H:%M:%S.%f")
         print(f"{time_str} {channel:02}  {pkt[0:len_bytes].hex()} {flag1:02x} {src:08x} {dst:08x} {payload[9:12].hex()} {payload[12:15].hex()} {payload[15:].hex()} {pkt[-2:].hex()}")
+        if self.print_mode == "summary":
+            return
+        if manchester_errors:
+            print(f"  {manchester_errors} Manchester code violations")
 
         if src & 0x80000000 == 0 and len(payload) > cmd_start:
             cmd_len = payload[cmd_start]
             if cmd_len == 0x33 and len(payload) >= cmd_start + 1 + cmd_len:
                 cmd_payload = payload[cmd_start + 1:cmd_start + 1 + cmd_len]
-                cmd = cmd_payload[1]
-                if cmd == 0xce:  # hourly usage data, every 6 hours
+                report = decode_command(FROM_METER, cmd_payload[1], cmd_payload, cmd_len)
+                if isinstance(report, hourly_report):
                     print()
 
                     main_reading = cmd_payload[44:47].hex()
                     print(f"  Meter reading for meter #{src}: {main_reading} kWh")
 
-                    n_hours = cmd_payload[9]
-                    if n_hours > 17:
-                        print(f"  Number of hourly readings is too high: {n_hours}")
-                        n_hours = 17
-                    hourly_readings = [reading / 100 for reading in struct.unpack(">" + "H"*n_hours, cmd_payload[10:10 + 2*n_hours])]
-                    readings_str = ", ".join(f"{reading:.2f}" for reading in hourly_readings)
+                    readings = report.readings
+                    if report.n_hours > 17:
+                        print(f"  Number of hourly readings is too high: {report.n_hours}")
+                        readings = readings[:17]
+                    readings_str = ", ".join(f"{reading / 100:.2f}" for reading in readings)
                     print(f"  Hourly readings: {readings_str}")
 
                     print()
 
     def forecast(self, noutput_items, ninputs):
-        return [640] * ninputs
+        # Never ask for more than a full search window used to require
+        return [min(f.items_needed(), self.max_request) for f in self.framers]
+
+    def _update_time_base(self, channel, n_items):
+        for tag in self.get_tags_in_window(channel, 0, n_items, pmt.intern("rx_time")):
+            seconds = pmt.to_uint64(pmt.tuple_ref(tag.value, 0)) + pmt.to_double(pmt.tuple_ref(tag.value, 1))
+            self.time_base[channel] = (tag.offset * self.bits_per_item, seconds)
 
     def general_work(self, input_items, output_items):
+        start_time = time.perf_counter()
+        if self.bit_rate and self.time_base is None:
+            self.time_base = [(0, self.start_time or time.time())] * len(input_items)
+        packets = []
+        items = 0
         for channel, bits in enumerate(input_items):
-            if self.bits_remaining[channel] > 0:
-                bits_to_take = min(self.bits_remaining[channel], len(bits))
-                self.packet_bits[channel] = numpy.append(self.packet_bits[channel], bits[:bits_to_take])
-                self.bits_remaining[channel] -= bits_to_take
-                if self.bits_remaining[channel] == 0:
-                    if self.packet_type[channel] == 1:
-                        packet_manchester = numpy.packbits(self.packet_bits[channel])
-                        packet_bits = numpy.fromiter((self.manchester[b] for b in packet_manchester), dtype=numpy.uint8)
-                        packet = (numpy.packbits(packet_bits) ^ 0x55).tobytes()
-                        self.process_packet(channel, packet)
-                    if self.packet_type[channel] == 2:
-                        packet = (numpy.packbits(self.packet_bits[channel]) ^ 0xaa).tobytes()
-                        self.process_packet(channel, packet)
-                    self.packet_bits[channel] = numpy.array([], dtype=numpy.uint8)
-                self.consume(channel, bits_to_take)
-            else:
-                if len(bits) >= 320:
-                    bits_string = bits.tobytes()
-                    offset = 0
-                    while True:
-                        index = bits_string.find(self.preamble, offset, -192)
-                        if index == -1:
-                            offset = len(bits) - 319
-                            break
-                        else:
-                            offset = index
-
-                        if bits_string[offset+128:offset+256] == self.sfd_1:
-                            offset += 256
-                            length = 0
-                            for digit_offset in range(0, 64, 8):
-                                digit_bits = bits_string[offset + digit_offset:offset + digit_offset + 8]
-                                digit_byte = 0
-                                for digit_bit in digit_bits:
-                                    digit_byte = (digit_byte << 1) | digit_bit
-                                length = (length << 1) | self.manchester[digit_byte]
-                            if length != -1:
-                                length ^= 0x55
-                                self.bits_remaining[channel] = (length + 2) * 64
-                                self.packet_type[channel] = 1
-                                break
-                        elif bits_string[offset+128:offset+256] == self.sfd_2:
-                            offset += 256
-                            length = 0
-                            for bit in bits_string[offset:offset+16]:
-                                length = (length << 1) | bit
-                            length ^= 0xaaaa
-                            if length < 512:
-                                self.bits_remaining[channel] = (length + 2) * 8
-                                self.packet_type[channel] = 2
-                                break
-                        else:
-                            offset += 8
-                    self.consume(channel, offset)
+            if self.bit_rate:
+                self._update_time_base(channel, len(bits))
+            for frame in self.framers[channel].work(bits):
+                if self.max_manchester_errors is not None and frame.manchester_errors > self.max_manchester_errors:
+                    self.stats[channel].manchester_rejects += 1
+                    if self.print_mode == "full":
+                        print("Too many Manchester code violations.")
+                    continue
+                timestamp = self._frame_time(channel, frame.offset) if self.bit_rate else None
+                packets.append((channel, frame.data, frame.manchester_errors, timestamp))
+            self.consume(channel, len(bits))
+            items += len(bits)
+
+        if packets:
+            # Check all frames completed in this call at once
+            crc_ok = check_crc_x25([packet for _, packet, _, _ in packets])
+            for (channel, packet, manchester_errors, timestamp), ok in zip(packets, crc_ok):
+                self.process_packet(channel, packet, ok, manchester_errors, timestamp)
 
+        self.work_items.add(items)
+        self.work_time.add(time.perf_counter() - start_time)
         return 0
@@ -0,0 +1,400 @@
+#
+# Copyright 2026 Clayton Smith.
+#
+# This is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this software; see the file COPYING.  If not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street,
+# Boston, MA 02110-1301, USA.
+#
+
+import mmap
+import os
+import queue
+import struct
+import threading
+import time
+
+LINKTYPE_USER0 = 147
+
+_SHB = 0x0a0d0d0a
+_IDB = 0x00000001
+_EPB = 0x00000006
+_OPT_COMMENT = 1
+_SHB_USERAPPL = 4
+_IF_NAME = 2
+_IF_TSRESOL = 9
+_EPB_FLAGS = 2
+# Inbound, with the "CRC error" link-layer error bit for bad frames
+_EPB_INBOUND = 0x00000001
+_EPB_CRC_ERROR = 0x01000000
+
+_STOP = object()
+
+_SHB_MAGIC = b"\x0a\x0d\x0d\x0a"
+_PCAP_MAGIC = {b"\xa1\xb2\xc3\xd4": ">", b"\xd4\xc3\xb2\xa1": "<"}
+_PCAP_HEADER_LEN = 24
+_PCAPNG_BOM = {b"\x1a\x2b\x3c\x4d": ">", b"\x4d\x3c\x2b\x1a": "<"}
+_RECORD = {endian: struct.Struct(endian + "IIII") for endian in "<>"}
+_BLOCK_HEADER = {endian: struct.Struct(endian + "II") for endian in "<>"}
+_EPB_HEADER = {endian: struct.Struct(endian + "IIIII") for endian in "<>"}
+_OPTION_HEADER = {endian: struct.Struct(endian + "HH") for endian in "<>"}
+_UINT32 = {endian: struct.Struct(endian + "I") for endian in "<>"}
+
+
+def _option(code, value):
+    return struct.pack("HH", code, len(value)) + value + bytes(-len(value) % 4)
+
+
+def _block(block_type, body):
+    length = 12 + len(body)
+    return struct.pack("II", block_type, length) + body + struct.pack("I", length)
+
+
+def _file_header(linktype, pcapng, num_interfaces):
+    if not pcapng:
+        return struct.pack("IHHIIII", 0xa1b2c3d4, 2, 4, 0, 0, 32767, linktype)
+    options = _option(_SHB_USERAPPL, b"gr-elster") + _option(0, b"")
+    header = _block(_SHB, struct.pack("IHHq", 0x1a2b3c4d, 1, 0, -1) + options)
+    for interface in range(num_interfaces):
+        options = _option(_IF_NAME, f"channel {interface:02}".encode()) + _option(_IF_TSRESOL, bytes([9]))
+        header += _block(_IDB, struct.pack("HHI", linktype, 0, 32767) + options + _option(0, b""))
+    return header
+
+
+class pcap_writer:
+    """Writes packets to a pcap file from a background thread.
+
+    Packets are queued by write() and never block the caller; when the queue
+    is full they are dropped and counted.  The file is flushed every
+    flush_packets packets and/or flush_interval seconds after the oldest
+    unflushed packet (0 disables either policy), and always on close().
+    Writes and flushes that fail with an OSError are counted in write_errors,
+    and the thread carries on with the next packet.  Packets written after
+    close() are refused and counted as dropped until start() reopens the
+    file, which truncates it again.
+
+    With pcapng=True the file is pcapng instead, with num_interfaces
+    interfaces (one per channel), nanosecond timestamps, and the interface,
+    comment and CRC status given to write() recorded with each packet.
+    Classic pcap ignores them.
+    """
+
+    def __init__(self, filename, linktype=LINKTYPE_USER0, queue_size=1024, flush_packets=1, flush_interval=0.0,
+                 pcapng=False, num_interfaces=1):
+        self.filename = filename
+        self.linktype = linktype
+        self.pcapng = pcapng
+        self.num_interfaces = num_interfaces
+        self.header_len = 0
+        self.flush_packets = flush_packets
+        self.flush_interval = flush_interval
+        self.queued = 0
+        self.written = 0
+        self.dropped = 0
+        self.write_errors = 0
+
+        self.file = None
+        self.queue = queue.Queue(queue_size)
+        self.thread = None
+        self.closed = True
+        self.start()
+
+    def start(self):
+        if not self.closed:
+            return
+        if self.file is None:
+            self._open()
+        self.closed = False
+        self.thread = threading.Thread(target=self._run, name=f"pcap_writer {self.filename}", daemon=True)
+        self.thread.start()
+
+    def write(self, timestamp, data, interface=0, comment=None, crc_ok=True):
+        if self.closed:
+            self.dropped += 1
+            return False
+        try:
+            self.queue.put_nowait((timestamp, bytes(data), interface, comment, crc_ok))
+        except queue.Full:
+            self.dropped += 1
+            return False
+        self.queued += 1
+        return True
+
+    def depth(self):
+        return self.queue.qsize()
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        # A full queue only drains while the thread is alive
+        while self.thread.is_alive():
+            try:
+                self.queue.put(_STOP, timeout=0.1)
+                break
+            except queue.Full:
+                pass
+        self.thread.join()
+        self.thread = None
+
+    def _open(self):
+        self._create(self.filename)
+
+    def _create(self, filename):
+        self.file = open(filename, "wb")
+        self.file.write(_file_header(self.linktype, self.pcapng, self.num_interfaces))
+        self.file.flush()
+        self.header_len = self.file.tell()
+
+    def _close_file(self):
+        file, self.file = self.file, None
+        file.close()
+
+    def _rotate_at(self):
+        # Wall-clock time at which the current file is due to be closed, if any
+        return None
+
+    def _make_room(self, record_len):
+        # Called before each record is written, with its encoded length
+        pass
+
+    def _write(self, *args):
+        record = self._record(*args)
+        self._make_room(len(record))
+        if self.file is None:
+            self._open()
+        self.file.write(record)
+
+    def _record(self, timestamp, data, interface, comment, crc_ok):
+        sec = int(timestamp)
+        if self.pcapng:
+            ns = sec * 1000000000 + int(round((timestamp - sec) * 1000000000))
+            options = b""
+            if comment:
+                options += _option(_OPT_COMMENT, comment.encode())
+            flags = _EPB_INBOUND if crc_ok else _EPB_INBOUND | _EPB_CRC_ERROR
+            options += _option(_EPB_FLAGS, struct.pack("I", flags)) + _option(0, b"")
+            body = struct.pack("IIIII", interface, ns >> 32, ns & 0xffffffff, len(data), len(data))
+            return _block(_EPB, body + data + bytes(-len(data) % 4) + options)
+        usec = int(round((timestamp - sec) * 1000000))
+        if usec == 1000000:
+            sec += 1
+            usec = 0
+        return struct.pack("IIII", sec, usec, len(data), len(data)) + data
+
+    def _run(self):
+        unflushed = 0
+        first_unflushed = 0.0
+        while True:
+            timeout = None
+            if unflushed and self.flush_interval > 0:
+                timeout = max(first_unflushed + self.flush_interval - time.monotonic(), 0)
+            rotate_at = self._rotate_at()
+            if rotate_at is not None:
+                rotate_timeout = max(rotate_at - time.time(), 0)
+                timeout = rotate_timeout if timeout is None else min(timeout, rotate_timeout)
+            try:
+                item = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            if item is _STOP:
+                break
+
+            if rotate_at is not None and time.time() >= rotate_at:
+                unflushed = 0
+                self._try(self._close_file)
+
+            if item is not None:
+                if self._try(self._write, *item):
+                    self.written += 1
+                if unflushed == 0:
+                    first_unflushed = time.monotonic()
+                unflushed += 1
+
+            if unflushed and ((self.flush_packets > 0 and unflushed >= self.flush_packets) or
+                              (self.flush_interval > 0 and time.monotonic() - first_unflushed >= self.flush_interval)):
+                unflushed = 0
+                if self.file is not None:
+                    self._try(self.file.flush)
+
+        if self.file is not None:
+            self._try(self._close_file)
+
+    def _try(self, function, *args):
+        # The thread must keep draining the queue, so a failed write is counted rather than raised
+        try:
+            function(*args)
+        except OSError:
+            self.write_errors += 1
+            return False
+        return True
+
+
+class rotating_pcap_writer(pcap_writer):
+    """A pcap_writer that starts a new file when the current one is full or old.
+
+    Files are created in directory and named by formatting template with
+    time.strftime in UTC when they are opened; a numeric suffix is added if
+    the name is taken.  The default template ends in .pcap or .pcapng to
+    match the format.  A file is closed once it would grow beyond max_bytes,
+    and at every multiple of max_seconds of wall-clock time (0 disables
+    either).  The next file is opened with the next packet.  Open files carry
+    a .part suffix and are renamed when closed, so a file under its final
+    name is complete.  max_bytes must leave room for the file header, which
+    for pcapng includes one interface description per channel.  start()
+    after close() opens a new file rather than truncating the last one.
+    """
+
+    def __init__(self, directory=".", template=None, max_bytes=0, max_seconds=0.0,
+                 linktype=LINKTYPE_USER0, queue_size=1024, flush_packets=1, flush_interval=0.0,
+                 pcapng=False, num_interfaces=1):
+        self.directory = directory
+        self.template = template or ("elster-%Y%m%dT%H%M%SZ.pcapng" if pcapng else "elster-%Y%m%dT%H%M%SZ.pcap")
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.next_rotation = None
+        header_len = len(_file_header(linktype, pcapng, num_interfaces))
+        if 0 < max_bytes <= header_len:
+            raise ValueError(f"max_bytes must exceed the {header_len} byte file header.")
+        os.makedirs(directory, exist_ok=True)
+        super().__init__(None, linktype, queue_size, flush_packets, flush_interval, pcapng, num_interfaces)
+
+    def _open(self):
+        now = time.time()
+        base, ext = os.path.splitext(os.path.join(self.directory, time.strftime(self.template, time.gmtime(now))))
+        filename = base + ext
+        i = 1
+        while os.path.exists(filename) or os.path.exists(filename + ".part"):
+            i += 1
+            filename = f"{base}-{i}{ext}"
+        self.filename = filename
+        self._create(filename + ".part")
+        if self.max_seconds > 0:
+            self.next_rotation = (now // self.max_seconds + 1) * self.max_seconds
+
+    def _close_file(self):
+        super()._close_file()
+        os.replace(self.filename + ".part", self.filename)
+
+    def _rotate_at(self):
+        return self.next_rotation if self.file is not None else None
+
+    def _make_room(self, record_len):
+        # A record larger than max_bytes still gets a file of its own
+        if self.file is not None and self.max_bytes > 0 and self.file.tell() > self.header_len and \
+                self.file.tell() + record_len > self.max_bytes:
+            self._close_file()
+
+
+class pcap_reader:
+    """Reads packets from a pcap or pcapng file without copying them.
+
+    The file is memory-mapped, and iterating yields (timestamp, data) for
+    each packet, where data is a memoryview into the mapping; use bytes() to
+    keep a packet beyond close().  Both byte orders are supported.  A
+    truncated last record, as left behind when a writer is killed, ends the
+    iteration quietly.  pcapng packets flagged with a CRC error are skipped.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        with open(filename, "rb") as f:
+            if os.fstat(f.fileno()).st_size < 4:
+                raise ValueError(f"{filename}: Invalid pcap file (too short)")
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = memoryview(self.map)
+
+        magic = bytes(self.view[:4])
+        if magic == _SHB_MAGIC:
+            self.pcapng = True
+        elif magic in _PCAP_MAGIC:
+            self.pcapng = False
+            self.endian = _PCAP_MAGIC[magic]
+            if len(self.view) < _PCAP_HEADER_LEN:
+                raise ValueError(f"{filename}: Invalid pcap file (too short)")
+        else:
+            self.close()
+            raise ValueError(f"{filename}: Not a pcap capture file (bad magic)")
+
+    def __iter__(self):
+        return self._read_pcapng() if self.pcapng else self._read_pcap()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self.view is None:
+            return
+        self.view.release()
+        self.view = None
+        try:
+            self.map.close()
+        except BufferError:
+            # Packets are still referenced; the mapping is unmapped along with them
+            pass
+
+    def _read_pcap(self):
+        view = self.view
+        record = _RECORD[self.endian]
+        offset = _PCAP_HEADER_LEN
+        while offset + record.size <= len(view):
+            sec, usec, caplen, _ = record.unpack_from(view, offset)
+            offset += record.size
+            if offset + caplen > len(view):
+                break
+            yield sec + usec / 1000000, view[offset:offset + caplen]
+            offset += caplen
+
+    def _read_pcapng(self):
+        view = self.view
+        endian = "<"
+        ts_units = []
+        offset = 0
+        while offset + 12 <= len(view):
+            if view[offset:offset + 4] == _SHB_MAGIC:
+                # A section header sets the byte order of everything up to the next one
+                endian = _PCAPNG_BOM.get(bytes(view[offset + 8:offset + 12]), endian)
+                ts_units = []
+            block_type, block_len = _BLOCK_HEADER[endian].unpack_from(view, offset)
+            if block_len < 12 or offset + block_len > len(view):
+                break
+            body, offset = view[offset + 8:offset + block_len - 4], offset + block_len
+
+            if block_type == _IDB:
+                resolution = 6
+                for code, value in self._options(body, 8, endian):
+                    if code == _IF_TSRESOL:
+                        resolution = value[0]
+                ts_units.append(2 ** -(resolution & 0x7f) if resolution & 0x80 else 10 ** -resolution)
+            elif block_type == _EPB:
+                interface, ts_high, ts_low, caplen, _ = _EPB_HEADER[endian].unpack_from(body)
+                flags = 0
+                for code, value in self._options(body, 20 + caplen + (-caplen % 4), endian):
+                    if code == _EPB_FLAGS:
+                        flags, = _UINT32[endian].unpack_from(value)
+                if flags & _EPB_CRC_ERROR:
+                    continue
+                yield ((ts_high << 32) | ts_low) * ts_units[interface], body[20:20 + caplen]
+
+    @staticmethod
+    def _options(body, offset, endian):
+        option = _OPTION_HEADER[endian]
+        while offset + option.size <= len(body):
+            code, length = option.unpack_from(body, offset)
+            if code == 0:
+                break
+            yield code, body[offset + 4:offset + 4 + length]
+            offset += 4 + length + (-length % 4)
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2026 Clayton Smith.
+#
+# This is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this software; see the file COPYING.  If not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street,
+# Boston, MA 02110-1301, USA.
+#
+
+import numpy
+from gnuradio import gr_unittest
+from elster.crc import crc_x25, check_crc_x25
+
+
+# Bit-at-a-time implementation previously used by packetize
+def crc_x25_bitwise(message):
+    poly = 0x8408
+    reg = 0xffff
+    for byte in message:
+        mask = 0x01
+        while mask < 0x100:
+            lowbit = reg & 1
+            reg >>= 1
+            if byte & mask:
+                lowbit ^= 1
+            mask <<= 1
+            if lowbit:
+                reg ^= poly
+    reg ^= 0xffff
+    return bytes([reg & 0xff, reg >> 8])
+
+
+class qa_crc(gr_unittest.TestCase):
+
+    def setUp(self):
+        rng = numpy.random.default_rng(2)
+        self.messages = [b"", b"\x00", b"\xff", b"123456789"]
+        self.messages += [rng.integers(0, 256, n, dtype=numpy.uint8).tobytes() for n in range(1, 514, 7)]
+        self.messages *= 2
+
+    def test_001_matches_bitwise(self):
+        for message in self.messages:
+            self.assertEqual(crc_x25(message), crc_x25_bitwise(message))
+        self.assertEqual(crc_x25(b"123456789"), bytes([0x6e, 0x90]))
+
+    def test_002_batch(self):
+        frames = [message + crc_x25_bitwise(message) for message in self.messages]
+        frames[5] = frames[5][:-1] + bytes([frames[5][-1] ^ 0x01])
+        frames[9] = b"\x12" + frames[9][1:]
+        frames.append(b"\xff")
+        expected = [True] * (len(frames) - 1) + [False]
+        expected[5] = False
+        expected[9] = frames[9] == self.messages[9] + crc_x25_bitwise(self.messages[9])
+        self.assertEqual(list(check_crc_x25(frames)), expected)
+        self.assertEqual(list(check_crc_x25(frames[:10])), expected[:10])
+        self.assertEqual(len(check_crc_x25([])), 0)
+
+
+if __name__ == '__main__':
+    gr_unittest.run(qa_crc)
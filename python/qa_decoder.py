@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2026 Clayton Smith.
+#
+# This is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this software; see the file COPYING.  If not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street,
+# Boston, MA 02110-1301, USA.
+#
+
+import struct
+from gnuradio import gr_unittest
+from elster.decoder import decode_command, hourly_report, packet_decoder, path_setup, register_command, reply, COMMANDS
+from elster.decoder import FROM_METER
+from elster.encoder import build_packet
+
+GATEKEEPER = 0x80001234
+
+
+def hourly_packet(meter, last_hour, readings):
+    reply = bytes([0, 0xce, 1, 0, 0]) + struct.pack(">HHB", last_hour, last_hour, len(readings))
+    reply += struct.pack(">" + "H" * len(readings), *readings)
+    # Packets are stored without their FCS
+    return build_packet(meter, GATEKEEPER, bytes(6) + bytes([len(reply)]) + reply)[:-2]
+
+
+def path_packet(meter, parent, level):
+    fields = struct.pack(">BBBBBIBBBBBBBBBBHIB", 0, 0, 0, 1, 2, parent, 0, 0, 0, level, 0, 0, 0, 0, 0, 0, 0, 0, 0)
+    return build_packet(GATEKEEPER, meter, bytes(14) + bytes([0x40, 0, 0, 0, 0x1e, 0, 0x23, 1]) + fields)[:-2]
+
+
+class qa_decoder(gr_unittest.TestCase):
+
+    def test_001_hourly(self):
+        decoder = packet_decoder()
+        record = decoder.decode(0, hourly_packet(0x123456, 2, [201, 301]))
+        self.assertEqual((record.src, record.dst, record.clock, record.rpt), (0x123456, GATEKEEPER, None, bytes(3)))
+        self.assertIsInstance(record.message, hourly_report)
+        self.assertEqual((record.message.last_hour, record.message.readings), (2, (201, 301)))
+        self.assertIn("cur_hour=00002 last_hour=00002 n_hour=02", str(record))
+
+        # Hours 65534 through 2, across the wraparound, with a gap at hour 0
+        decoder.decode(1, hourly_packet(0x123456, 65535, [50, 60]))
+        self.assertEqual(list(decoder.meter_readings(0x123456)), [50, 60, -1, 201, 301])
+
+    def test_002_topology(self):
+        decoder = packet_decoder()
+        record = decoder.decode(0, path_packet(0x111111, 0x222222, 2))
+        self.assertEqual(record.clock, (0, 0, 0.0))
+        self.assertIsInstance(record.message.body.body, path_setup)
+        self.assertEqual((record.message.body.body.parent, record.message.body.body.level), (0x222222, 2))
+        self.assertEqual(decoder.parents, {0x111111: 0x222222, 0x222222: GATEKEEPER})
+        self.assertEqual(decoder.gatekeepers, {0x111111: GATEKEEPER, 0x222222: GATEKEEPER})
+        self.assertEqual(decoder.levels, {0x111111: 2, 0x222222: 1, GATEKEEPER: 0})
+
+    def test_003_merge(self):
+        packets = [hourly_packet(1, (65530 + 4 * i) % 65536, [i] * 6) for i in range(4)]
+        packets += [path_packet(2, 3, 2), path_packet(2, 4, 3)]
+        packets += [hourly_packet(1, 1, [7] * 3), hourly_packet(5, 10, [8])]
+
+        whole = packet_decoder()
+        for pkt in packets:
+            whole.decode(0, pkt)
+        merged = packet_decoder()
+        for start, end in ((0, 3), (3, 5), (5, len(packets))):
+            part = packet_decoder()
+            for pkt in packets[start:end]:
+                part.decode(0, pkt)
+            merged.merge(part)
+
+        self.assertEqual(merged.first_hour, whole.first_hour)
+        self.assertEqual(merged.last_hour, whole.last_hour)
+        for meter in whole.readings:
+            self.assertEqual(list(merged.meter_readings(meter)), list(whole.meter_readings(meter)))
+        self.assertEqual((merged.parents, merged.gatekeepers, merged.levels), (whole.parents, whole.gatekeepers, whole.levels))
+
+    def test_004_register(self):
+        pkt = hourly_packet(0x123456, 2, [201, 301])
+        pkt = pkt[:18] + b"\x99" + pkt[19:]
+        self.assertEqual(str(packet_decoder().decode(0, pkt).message), "todo=" + pkt[16:].hex())
+
+        @register_command(FROM_METER, 0x99, ">BBB")
+        def decode_test(layout, body, length):
+            return reply(length, *layout.unpack_from(body), body[layout.size:])
+        try:
+            record = packet_decoder().decode(0, pkt).message
+            self.assertEqual((record.cmd, record.data), (0x99, pkt[20:]))
+            self.assertEqual(decode_command(FROM_METER, 0x99, pkt[17:], pkt[16]), record)
+        finally:
+            del COMMANDS[FROM_METER, 0x99]
+
+
+if __name__ == '__main__':
+    gr_unittest.run(qa_decoder)
@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2026 Clayton Smith.
+#
+# This is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this software; see the file COPYING.  If not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street,
+# Boston, MA 02110-1301, USA.
+#
+
+from gnuradio import gr_unittest
+from elster.dedup import dedup_cache
+
+
+class qa_dedup(gr_unittest.TestCase):
+
+    def test_001_repeats(self):
+        cache = dedup_cache(ttl=2.0)
+        self.assertTrue(cache.check(b"\x01\x02", 100.0))
+        self.assertTrue(cache.check(b"\x01\x03", 100.1))
+        self.assertFalse(cache.check(b"\x01\x02", 100.5))
+        self.assertFalse(cache.check(b"\x01\x03", 101.9))
+        self.assertEqual((cache.hits, cache.misses), (2, 2))
+
+    def test_002_ttl(self):
+        cache = dedup_cache(ttl=2.0)
+        self.assertTrue(cache.check(b"a", 100.0))
+        self.assertTrue(cache.check(b"b", 101.0))
+        self.assertTrue(cache.check(b"a", 102.0))
+        self.assertFalse(cache.check(b"b", 102.5))
+        self.assertEqual(len(cache), 2)
+
+    def test_003_bounded(self):
+        cache = dedup_cache(ttl=60.0, max_entries=3)
+        for key in [b"a", b"b", b"c", b"d"]:
+            self.assertTrue(cache.check(key, 0.0))
+        self.assertEqual(len(cache), 3)
+        self.assertTrue(cache.check(b"a", 0.0))
+        self.assertFalse(cache.check(b"d", 0.0))
+
+
+if __name__ == '__main__':
+    gr_unittest.run(qa_dedup)
@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2026 Clayton Smith.
+#
+# This is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this software; see the file COPYING.  If not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street,
+# Boston, MA 02110-1301, USA.
+#
+
+import numpy
+from gnuradio import gr_unittest
+from elster.crc import check_crc_x25
+from elster.encoder import build_packet, channel_streams, frame_bits, random_packet
+from elster.framer import framer
+
+
+class qa_encoder(gr_unittest.TestCase):
+
+    def test_001_build_packet(self):
+        pkt = build_packet(0x1234, 0x89abcdef, b"\x01\x02", frame_type=1)
+        self.assertEqual(pkt[:12], bytes([12, 0x40, 0, 0, 0x12, 0x34, 0x89, 0xab, 0xcd, 0xef, 1, 2]))
+        self.assertEqual(len(pkt), 14)
+        pkt = build_packet(0x1234, 0x89abcdef, b"\x01\x02", frame_type=2)
+        self.assertEqual(pkt[:3], bytes([0, 13, 0x40]))
+        self.assertEqual(len(pkt), 15)
+        self.assertTrue(all(check_crc_x25([pkt])))
+        self.assertRaises(ValueError, build_packet, 0, 0, bytes(300), frame_type=1)
+        self.assertRaises(ValueError, build_packet, 0, 0, bytes(510), frame_type=2)
+
+    def test_002_frame_lengths(self):
+        pkt = build_packet(1, 2, bytes(10), frame_type=1)
+        self.assertEqual(len(frame_bits(pkt)), 256 + len(pkt) * 64)
+        pkt = build_packet(1, 2, bytes(300), frame_type=2)
+        self.assertEqual(len(frame_bits(pkt)), 256 + len(pkt) * 8)
+
+    def test_003_round_trip(self):
+        rng = numpy.random.default_rng(5)
+        packets = [random_packet(rng, 1 + i % 2, 10 + i) for i in range(9)]
+        streams, sent = channel_streams(rng, packets, num_channels=3, copies=2)
+        self.assertEqual([len(bits) for bits in streams], [len(streams[0])] * 3)
+        for channel, bits in enumerate(streams):
+            frames = framer().work(bits)
+            self.assertEqual([frame.data for frame in frames], [pkt for _, pkt in sent[channel]])
+            for offset, pkt in sent[channel]:
+                numpy.testing.assert_array_equal(bits[offset:offset + 256], frame_bits(pkt)[:256])
+        self.assertEqual(sum(len(s) for s in sent), 18)
+
+
+if __name__ == '__main__':
+    gr_unittest.run(qa_encoder)
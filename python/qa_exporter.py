@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2026 Clayton Smith.
+#
+# This is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this software; see the file COPYING.  If not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street,
+# Boston, MA 02110-1301, USA.
+#
+
+import os
+import tempfile
+import urllib.request
+from gnuradio import gr_unittest
+from elster import packetize
+
+
+class qa_exporter(gr_unittest.TestCase):
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        os.chdir(self.tmpdir.name)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmpdir.cleanup()
+
+    def test_001_scrape(self):
+        block = packetize(2, print_mode="off")
+        block.stats[1].valid_frames = 5
+        block.dedup.check(b"frame", 0.0)
+        block.dedup.check(b"frame", 0.5)
+
+        from elster.exporter import metrics_exporter
+        exporter = metrics_exporter([block], port=0, interval=60.0)
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{exporter.port}/metrics") as response:
+                text = response.read().decode()
+        finally:
+            exporter.close()
+            block.stop()
+
+        name = block.alias()
+        self.assertIn("# TYPE elster_valid_frames_total counter", text)
+        self.assertIn(f'elster_valid_frames_total{{block="{name}",channel="1"}} 5', text)
+        self.assertIn(f'elster_valid_frames_total{{block="{name}",channel="0"}} 0', text)
+        self.assertIn(f'elster_dedup_hit_ratio{{block="{name}"}} 0.5', text)
+        self.assertIn(f'elster_pcap_queue_depth{{block="{name}"}} 0', text)
+        self.assertIn(f'elster_work_seconds_bucket{{block="{name}",le="+Inf"}} 0', text)
+
+    def test_002_restart(self):
+        # GNU Radio stops and starts blocks again when a flowgraph is rerun
+        block = packetize(1, print_mode="off", metrics_file="metrics.json")
+        from elster.exporter import metrics_exporter
+        exporter = metrics_exporter([block], port=0, interval=60.0)
+        try:
+            for _ in range(2):
+                block.stop()
+                exporter.close()
+                self.assertFalse(block.pcap.write(0, b"\x00"))
+                block.start()
+                exporter.start()
+                self.assertTrue(block.pcap.write(0, b"\x00"))
+                with urllib.request.urlopen(f"http://127.0.0.1:{exporter.port}/metrics") as response:
+                    self.assertEqual(response.status, 200)
+        finally:
+            exporter.close()
+            block.stop()
+        self.assertEqual(block.pcap.written, 2)
+        self.assertTrue(os.path.exists("metrics.json"))
+
+    def test_003_export_blocks(self):
+        block = packetize(1, print_mode="off")
+        self.assertRaises(ValueError, block.export_blocks, [block])
+        block.stop()
+
+        from elster.exporter import metrics_exporter
+        other = packetize(1, print_mode="off")
+        exporter = metrics_exporter([block], port=0, interval=60.0)
+        try:
+            exporter.add_blocks([other])
+            exporter.close()
+            exporter.start()
+            with urllib.request.urlopen(f"http://127.0.0.1:{exporter.port}/metrics") as response:
+                text = response.read().decode()
+        finally:
+            exporter.close()
+            other.stop()
+        # Both blocks are in the snapshot taken when the exporter was started again
+        self.assertEqual(text.count("elster_pcap_queue_depth{"), 2)
+
+
+if __name__ == '__main__':
+    gr_unittest.run(qa_exporter)
@@ -0,0 +1,226 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2026 Clayton Smith.
+#
+# This is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this software; see the file COPYING.  If not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street,
+# Boston, MA 02110-1301, USA.
+#
+
+import functools
+import struct
+import numpy
+from gnuradio import gr_unittest
+from elster.crc import crc_x25
+from elster.framer import check_header, check_length, framer, overlap_framer, SEARCH_WINDOW
+from elster.sync import find_sync_soft, PREAMBLE, SFD_1, SFD_2
+
+# From a meter to a gatekeeper
+ADDRESSES = struct.pack(">II", 0x00123456, 0x80001234)
+
+
+def type_1_bits(body):
+    pkt = bytes([len(body) + 1]) + body
+    pkt += crc_x25(pkt)
+    bits = numpy.unpackbits(numpy.frombuffer(pkt, dtype=numpy.uint8) ^ 0x55)
+    chips = numpy.where(bits[:, None] == 1, [1, 1, 1, 1, 0, 0, 0, 0], [0, 0, 0, 0, 1, 1, 1, 1]).astype(numpy.uint8).ravel()
+    return pkt, numpy.concatenate([PREAMBLE, SFD_1, chips])
+
+
+def type_2_bits(body):
+    length = len(body) + 2
+    pkt = bytes([length >> 8, length & 0xff]) + body
+    pkt += crc_x25(pkt)
+    bits = numpy.unpackbits(numpy.frombuffer(pkt, dtype=numpy.uint8) ^ 0xaa)
+    return pkt, numpy.concatenate([PREAMBLE, SFD_2, bits])
+
+
+class qa_framer(gr_unittest.TestCase):
+
+    def setUp(self):
+        rng = numpy.random.default_rng(3)
+        self.packets = []
+        self.offsets = []
+        parts = []
+        length = 0
+        for i in range(6):
+            parts.append(rng.integers(0, 2, 300 + 37 * i, dtype=numpy.uint8))
+            body = bytearray([0x40]) + rng.integers(0, 256, 20 + 3 * i, dtype=numpy.uint8).tobytes()
+            body[5] |= 0x80
+            pkt, bits = (type_1_bits if i % 2 else type_2_bits)(bytes(body))
+            self.packets.append(pkt)
+            self.offsets.append(length + len(parts[-1]))
+            parts.append(bits)
+            length += len(parts[-2]) + len(bits)
+        parts.append(rng.integers(0, 2, 100, dtype=numpy.uint8))
+        self.bits = numpy.concatenate(parts)
+
+    def run_chunks(self, chunk_sizes):
+        f = framer()
+        frames = []
+        offset = 0
+        for size in chunk_sizes:
+            frames += f.work(self.bits[offset:offset + size])
+            offset += size
+        frames += f.work(self.bits[offset:])
+        return frames
+
+    def test_001_single_call(self):
+        frames = self.run_chunks([])
+        self.assertEqual([frame.data for frame in frames], self.packets)
+        self.assertEqual([frame.frame_type for frame in frames], [2, 1, 2, 1, 2, 1])
+        self.assertEqual([frame.manchester_errors for frame in frames], [0] * 6)
+        self.assertEqual([frame.offset for frame in frames], self.offsets)
+
+    def test_002_small_calls(self):
+        for size in [1, 7, 64, 319, 320, 641]:
+            frames = self.run_chunks([size] * (len(self.bits) // size))
+            self.assertEqual([frame.data for frame in frames], self.packets)
+            self.assertEqual([frame.offset for frame in frames], self.offsets)
+
+    def test_003_packed(self):
+        packed = numpy.packbits(self.bits)
+        for size in [1, 13, 40, 80, len(packed)]:
+            f = framer(packed=True)
+            frames = []
+            for offset in range(0, len(packed), size):
+                frames += f.work(packed[offset:offset + size])
+            self.assertEqual([frame.data for frame in frames], self.packets)
+            self.assertEqual([frame.offset for frame in frames], self.offsets)
+
+    def test_004_soft(self):
+        rng = numpy.random.default_rng(4)
+        symbols = (self.bits.astype(numpy.float32) * 2 - 1) + rng.normal(0, 0.25, len(self.bits)).astype(numpy.float32)
+        for size in [50, 333, len(symbols)]:
+            f = framer(functools.partial(find_sync_soft, threshold=0.6), soft=True)
+            frames = []
+            for offset in range(0, len(symbols), size):
+                frames += f.work(symbols[offset:offset + size])
+            self.assertEqual([frame.data for frame in frames], self.packets)
+            self.assertEqual([frame.offset for frame in frames], self.offsets)
+
+    def test_005_bits_needed(self):
+        f = framer()
+        self.assertEqual(f.bits_needed(), SEARCH_WINDOW)
+        f.work(self.bits[:100])
+        self.assertEqual(f.bits_needed(), SEARCH_WINDOW)
+        # A search that finds nothing still waits for a batch of new offsets
+        f.work(self.bits[100:300])
+        self.assertEqual(f.bits_needed(), SEARCH_WINDOW)
+        pkt, bits = type_2_bits(bytes(20))
+        f = framer()
+        f.work(bits[:SEARCH_WINDOW + 10])
+        self.assertEqual(f.bits_needed(), len(bits) - SEARCH_WINDOW - 10)
+        f = framer(packed=True)
+        f.work(numpy.packbits(bits[:SEARCH_WINDOW + 10]))
+        self.assertEqual(f.items_needed(), -(-(len(bits) - SEARCH_WINDOW - 16) // 8))
+
+    def test_006_header_abort(self):
+        # A sync whose header addresses the sender itself, claiming a 500 byte frame, straight before a real frame
+        header = bytes([0x01, 0xf4, 0x40]) + bytes([0x12, 0x34, 0x56, 0x78]) * 2
+        bogus = numpy.concatenate([PREAMBLE, SFD_2, numpy.unpackbits(numpy.frombuffer(header, dtype=numpy.uint8) ^ 0xaa)])
+        pkt, bits = type_1_bits(bytes([0x40]) + ADDRESSES + bytes(range(22)))
+        noise = numpy.random.default_rng(6).integers(0, 2, 5000, dtype=numpy.uint8)
+        stream = numpy.concatenate([noise[:300], bogus, bits, noise])
+        for size in [1, 100, len(stream)]:
+            f = framer()
+            frames = []
+            for offset in range(0, len(stream), size):
+                frames += f.work(stream[offset:offset + size])
+            self.assertEqual([frame.data for frame in frames], [pkt])
+            self.assertEqual([frame.offset for frame in frames], [300 + len(bogus)])
+            self.assertEqual(f.stats.header_rejects, 1)
+        # Without the check, the real frame is swallowed by the bogus capture
+        frames = framer(header_check=None).work(stream)
+        self.assertEqual([frame.offset for frame in frames], [300])
+        self.assertNotIn(pkt, [frame.data for frame in frames])
+
+    def test_007_short_length(self):
+        pkt, bits = type_2_bits(bytes([0x40]) + bytes(7))
+        f = framer()
+        self.assertEqual(f.work(numpy.concatenate([bits, numpy.zeros(500, dtype=numpy.uint8)])), [])
+        self.assertEqual(f.stats.length_rejects, 1)
+
+    def test_008_overlap(self):
+        for size in [1, 100, 641, len(self.bits)]:
+            f = overlap_framer()
+            frames = []
+            for offset in range(0, len(self.bits), size):
+                frames += f.work(self.bits[offset:offset + size])
+            self.assertEqual([frame.data for frame in frames], self.packets)
+            self.assertEqual([frame.offset for frame in frames], self.offsets)
+
+        # A plausible but bogus header claiming 500 bytes, with a real frame starting inside it
+        header = bytes([0x01, 0xf4, 0x40]) + bytes([0x12, 0x34, 0x56, 0x78, 0x9a, 0xbc, 0xde, 0xf0])
+        bogus = numpy.concatenate([PREAMBLE, SFD_2, numpy.unpackbits(numpy.frombuffer(header, dtype=numpy.uint8) ^ 0xaa)])
+        pkt, bits = type_2_bits(bytes([0x40]) + ADDRESSES + bytes(range(22)))
+        noise = numpy.random.default_rng(8).integers(0, 2, 5000, dtype=numpy.uint8)
+        stream = numpy.concatenate([noise[:300], bogus, noise[:200], bits, noise])
+        self.assertNotIn(pkt, [frame.data for frame in framer().work(stream)])
+        for size in [1, 100, len(stream)]:
+            f = overlap_framer()
+            frames = []
+            for offset in range(0, len(stream), size):
+                frames += f.work(stream[offset:offset + size])
+            self.assertEqual([frame.data for frame in frames], [pkt])
+            self.assertEqual(f.candidates, [])
+
+        f = overlap_framer(max_candidates=1)
+        self.assertEqual(f.work(stream)[0].offset, 300)
+        self.assertEqual(f.stats.candidate_overflows, 1)
+
+    def test_009_preamble_hits(self):
+        # Each preamble is counted once, however the stream is split
+        long_preamble = numpy.concatenate([PREAMBLE, PREAMBLE, self.bits])
+        for size in [1, 100, 641, len(long_preamble)]:
+            for f in (framer(), overlap_framer()):
+                for offset in range(0, len(long_preamble), size):
+                    f.work(long_preamble[offset:offset + size])
+                self.assertEqual(f.stats.preamble_hits, 7)
+                self.assertEqual(f.stats.sfd_1_hits + f.stats.sfd_2_hits, 6)
+
+    def test_010_check_header(self):
+        def header(src, dst, flag=0x40):
+            return bytes([0, 30, flag]) + struct.pack(">II", src, dst)
+        self.assertTrue(check_header(header(0x00123456, 0x80001234)))
+        self.assertTrue(check_header(header(0x80001234, 0x00123456)))
+        self.assertTrue(check_header(header(0x80001234, 0)))
+        self.assertTrue(check_header(bytes([30, 0x40]) + ADDRESSES))
+        self.assertFalse(check_header(header(0x00123456, 0x00123456)))
+        self.assertFalse(check_header(header(0x00123456, 0x00654321)))
+        self.assertFalse(check_header(header(0x00123456, 0x80001234, 0x41), valid_flags={0x40}))
+
+        # Random bits that happen to form a sync, claiming 500 bytes between two meters, straight before a real frame
+        garbage = bytes([0x01, 0xf4, 0x40]) + struct.pack(">II", 0x3f1c07a2, 0x5e90d4b1)
+        bogus = numpy.concatenate([PREAMBLE, SFD_2, numpy.unpackbits(numpy.frombuffer(garbage, dtype=numpy.uint8) ^ 0xaa)])
+        pkt, bits = type_2_bits(bytes([0x40]) + ADDRESSES + bytes(range(22)))
+        stream = numpy.concatenate([bogus, bits, numpy.zeros(500, dtype=numpy.uint8)])
+        f = framer()
+        self.assertEqual([frame.data for frame in f.work(stream)], [pkt])
+        self.assertEqual(f.stats.header_rejects, 1)
+
+    def test_011_check_length(self):
+        pkt, _ = type_1_bits(bytes([0x40]) + ADDRESSES)
+        self.assertTrue(check_length(pkt))
+        self.assertFalse(check_length(pkt[:-1]))
+        pkt, _ = type_2_bits(bytes([0x40]) + ADDRESSES + bytes(3))
+        self.assertTrue(check_length(pkt))
+        self.assertFalse(check_length(pkt + b"\x00"))
+        # Too short to hold the flag and both addresses
+        self.assertFalse(check_length(bytes([9]) + bytes(10)))
+
+
+if __name__ == '__main__':
+    gr_unittest.run(qa_framer)
@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2026 Clayton Smith.
+#
+# This is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this software; see the file COPYING.  If not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street,
+# Boston, MA 02110-1301, USA.
+#
+
+import numpy
+from gnuradio import gr_unittest
+from elster.manchester import decode_manchester, decode_length_1, decode_length_2, MANCHESTER
+
+
+def encode(data):
+    bits = numpy.unpackbits(numpy.frombuffer(data, dtype=numpy.uint8))
+    return numpy.where(bits[:, None] == 1, [1, 1, 1, 1, 0, 0, 0, 0], [0, 0, 0, 0, 1, 1, 1, 1]).astype(numpy.uint8).ravel()
+
+
+class qa_manchester(gr_unittest.TestCase):
+
+    def test_001_table(self):
+        # Same majority decision as the original list-based table
+        expected = [int(f"{b:08b}"[:4].count("1") > f"{b:08b}"[4:].count("1")) for b in range(256)]
+        self.assertEqual(list(MANCHESTER), expected)
+
+    def test_002_decode(self):
+        data = bytes(range(0, 256, 5))
+        decoded, errors = decode_manchester(encode(data))
+        self.assertEqual(decoded.tobytes(), data)
+        self.assertEqual(errors, 0)
+
+    def test_003_violations(self):
+        bits = encode(b"\x5a\xc3")
+        bits[0:8] = [1, 1, 1, 1, 1, 1, 1, 1]
+        bits[16:24] = [0, 0, 1, 1, 1, 1, 0, 0]
+        bits[32:40] = [1, 1, 1, 0, 0, 0, 0, 1]
+        decoded, errors = decode_manchester(bits)
+        self.assertEqual(errors, 2)
+        self.assertEqual(decoded.tobytes(), b"\x5a\xc3")
+
+    def test_004_length(self):
+        self.assertEqual(decode_length_1(encode(bytes([0x55 ^ 0x2a]))), (0x2a, 0))
+        bits = numpy.unpackbits(numpy.array([0xaa ^ 0x01, 0xaa ^ 0x23], dtype=numpy.uint8))
+        self.assertEqual(decode_length_2(bits), 0x0123)
+
+
+if __name__ == '__main__':
+    gr_unittest.run(qa_manchester)
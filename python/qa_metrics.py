@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2026 Clayton Smith.
+#
+# This is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this software; see the file COPYING.  If not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street,
+# Boston, MA 02110-1301, USA.
+#
+
+import json
+import os
+import tempfile
+from gnuradio import gr_unittest
+from elster.metrics import channel_stats, histogram, snapshot_writer
+
+
+class qa_metrics(gr_unittest.TestCase):
+
+    def test_001_histogram(self):
+        h = histogram([1, 2, 4])
+        for value in [0, 1, 1.5, 3, 4, 100]:
+            h.add(value)
+        self.assertEqual(h.counts, [2, 1, 2, 1])
+        self.assertEqual((h.count, h.sum), (6, 109.5))
+
+    def test_002_snapshot(self):
+        stats = channel_stats()
+        stats.valid_frames += 3
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = os.path.join(tmpdir, "metrics.json")
+            writer = snapshot_writer(filename, 60.0, lambda: {"channels": [stats.as_dict()]})
+            writer.close()
+            with open(filename) as f:
+                snapshot = json.load(f)
+            self.assertEqual(os.listdir(tmpdir), ["metrics.json"])
+        self.assertEqual(snapshot["channels"][0]["valid_frames"], 3)
+        self.assertEqual(snapshot["channels"][0]["crc_failures"], 0)
+
+
+if __name__ == '__main__':
+    gr_unittest.run(qa_metrics)
@@ -1,7 +1,7 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 #
-# Copyright 2019 Clayton Smith.
+# Copyright 2026 Clayton Smith.
 #
 # This is free software; you can redistribute it and/or modify
 # it under the terms of the GNU General Public License as published by
@@ -19,22 +19,77 @@
 # Boston, MA 02110-1301, USA.
 #
 
+import os
+import tempfile
+import numpy
+import pmt
 from gnuradio import gr, gr_unittest
 from gnuradio import blocks
-from packetize import packetize
+from elster import packetize
+from elster.encoder import build_packet, channel_streams, random_packet
+
 
 class qa_packetize(gr_unittest.TestCase):
 
     def setUp(self):
         self.tb = gr.top_block()
+        self.cwd = os.getcwd()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        os.chdir(self.tmpdir.name)
 
     def tearDown(self):
         self.tb = None
+        os.chdir(self.cwd)
+        self.tmpdir.cleanup()
 
-    def test_001_t(self):
-        # set up fg
+    def run_streams(self, streams, **kwargs):
+        dut = packetize(len(streams), print_mode="off", **kwargs)
+        sink = blocks.message_debug()
+        for channel, bits in enumerate(streams):
+            self.tb.connect(blocks.vector_source_b(bits.tolist()), (dut, channel))
+        self.tb.msg_connect(dut, "pdus", sink, "store")
         self.tb.run()
-        # check data
+        self.pdus = [sink.get_message(i) for i in range(sink.num_messages())]
+        return dut, [bytes(pmt.u8vector_elements(pmt.cdr(pdu))) for pdu in self.pdus]
+
+    def test_001_frames(self):
+        rng = numpy.random.default_rng(1)
+        packets = [random_packet(rng, 1 + i % 2, 20 + i) for i in range(12)]
+        streams, _ = channel_streams(rng, packets, num_channels=3)
+        dut, data = self.run_streams(streams)
+        self.assertEqual(sorted(data), sorted(pkt[:-2] for pkt in packets))
+        self.assertEqual(sum(dut.channel_counters(c)["valid_frames"] for c in range(3)), 12)
+        self.assertEqual(dut.pcap_written(), 12)
+
+    def test_002_duplicates(self):
+        rng = numpy.random.default_rng(2)
+        packets = [random_packet(rng, 2, 30) for _ in range(4)]
+        streams, _ = channel_streams(rng, packets, num_channels=2, copies=2, gap=(200, 201))
+        dut, data = self.run_streams(streams)
+        self.assertEqual(sorted(data), sorted(pkt[:-2] for pkt in packets))
+        self.assertEqual(sum(dut.duplicate_counts()), 4)
+
+    def test_003_timestamps(self):
+        rng = numpy.random.default_rng(3)
+        packets = [random_packet(rng, 1 + i % 2, 20) for i in range(6)]
+        streams, sent = channel_streams(rng, packets, num_channels=2)
+        dut, data = self.run_streams(streams, bit_rate=1000.0, start_time=5000.0)
+        timestamps = {bytes(pmt.u8vector_elements(pmt.cdr(pdu))):
+                      pmt.to_double(pmt.dict_ref(pmt.car(pdu), pmt.intern("timestamp"), pmt.PMT_NIL)) for pdu in self.pdus}
+        for channel_sent in sent:
+            for offset, pkt in channel_sent:
+                self.assertAlmostEqual(timestamps[pkt[:-2]], 5000.0 + offset / 1000.0)
+
+    def test_004_check_headers(self):
+        rng = numpy.random.default_rng(4)
+        # A device never addresses itself, so the default header check drops this frame
+        packets = [build_packet(0x80001234, 0x80001234, bytes(20)), random_packet(rng, 2, 20)]
+        streams, _ = channel_streams(rng, packets, num_channels=1)
+        _, data = self.run_streams(streams)
+        self.assertEqual(data, [packets[1][:-2]])
+        self.tb = gr.top_block()
+        _, data = self.run_streams(streams, check_headers=False)
+        self.assertEqual(data, [pkt[:-2] for pkt in packets])
 
 
 if __name__ == '__main__':
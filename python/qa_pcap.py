@@ -0,0 +1,231 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2026 Clayton Smith.
+#
+# This is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this software; see the file COPYING.  If not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street,
+# Boston, MA 02110-1301, USA.
+#
+
+import os
+import struct
+import tempfile
+import threading
+import time
+from gnuradio import gr_unittest
+from elster.pcap import pcap_reader, pcap_writer, rotating_pcap_writer
+
+
+class qa_pcap(gr_unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmpdir.name, "test.pcap")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def read_records(self, filename=None):
+        with open(filename or self.filename, "rb") as f:
+            data = f.read()
+        magic, vermaj, vermin, _, _, snaplen, linktype = struct.unpack("IHHIIII", data[:24])
+        self.assertEqual((magic, vermaj, vermin, linktype), (0xa1b2c3d4, 2, 4, 147))
+        records = []
+        offset = 24
+        while offset < len(data):
+            sec, usec, caplen, wirelen = struct.unpack("IIII", data[offset:offset+16])
+            records.append((sec, usec, data[offset+16:offset+16+caplen]))
+            offset += 16 + caplen
+        return records
+
+    def test_001_write(self):
+        writer = pcap_writer(self.filename, flush_packets=0)
+        self.assertTrue(writer.write(1000.25, b"\x01\x02\x03"))
+        self.assertTrue(writer.write(1001.999999, bytearray(b"\x04")))
+        writer.close()
+        writer.close()
+        self.assertEqual((writer.queued, writer.written, writer.dropped), (2, 2, 0))
+        self.assertEqual(self.read_records(), [(1000, 250000, b"\x01\x02\x03"), (1001, 999999, b"\x04")])
+
+    def test_002_flush_interval(self):
+        writer = pcap_writer(self.filename, flush_packets=0, flush_interval=0.01)
+        for i in range(100):
+            writer.write(i, bytes([i]))
+        writer.close()
+        self.assertEqual(writer.written + writer.dropped, 100)
+        self.assertEqual([record[2] for record in self.read_records()], [bytes([i]) for i in range(writer.written)])
+
+    def test_003_rotate_size(self):
+        directory = os.path.join(self.tmpdir.name, "out")
+        writer = rotating_pcap_writer(directory, "test-%Y.pcap", max_bytes=24 + 2 * (16 + 10), flush_packets=0)
+        for i in range(5):
+            writer.write(i, bytes([i]) * 10)
+        writer.close()
+        year = time.strftime("%Y", time.gmtime())
+        names = [f"test-{year}.pcap", f"test-{year}-2.pcap", f"test-{year}-3.pcap"]
+        self.assertEqual(sorted(os.listdir(directory)), sorted(names))
+        records = [self.read_records(os.path.join(directory, name)) for name in names]
+        self.assertEqual([[record[2][0] for record in file_records] for file_records in records], [[0, 1], [2, 3], [4]])
+
+    def test_004_rotate_time(self):
+        writer = rotating_pcap_writer(self.tmpdir.name, "test-%H%M%S.pcap", max_seconds=0.05, flush_packets=0)
+        writer.write(0, b"\x00")
+        first = writer.filename
+        time.sleep(0.2)
+        # The first file is closed on time even though no packet followed
+        self.assertTrue(os.path.exists(first))
+        self.assertFalse(os.path.exists(first + ".part"))
+        writer.write(1, b"\x01")
+        writer.close()
+        self.assertNotEqual(writer.filename, first)
+        self.assertEqual(self.read_records(first), [(0, 0, b"\x00")])
+        self.assertEqual(self.read_records(writer.filename), [(1, 0, b"\x01")])
+
+    def test_005_pcapng(self):
+        writer = pcap_writer(self.filename, flush_packets=0, pcapng=True, num_interfaces=3)
+        writer.write(1000.000000123, b"\x01\x02\x03", interface=2, comment="type=1 crc=ok")
+        writer.write(1001.5, b"\x04", interface=0, crc_ok=False)
+        writer.close()
+        with open(self.filename, "rb") as f:
+            data = f.read()
+        blocks = []
+        offset = 0
+        while offset < len(data):
+            block_type, length = struct.unpack("II", data[offset:offset+8])
+            self.assertEqual(struct.unpack("I", data[offset+length-4:offset+length])[0], length)
+            blocks.append((block_type, data[offset+8:offset+length-4]))
+            offset += length
+        self.assertEqual([block_type for block_type, _ in blocks], [0x0a0d0d0a, 1, 1, 1, 6, 6])
+        self.assertEqual(struct.unpack("I", blocks[0][1][:4])[0], 0x1a2b3c4d)
+        self.assertEqual(struct.unpack("HHI", blocks[1][1][:8]), (147, 0, 32767))
+        self.assertIn(struct.pack("HH", 9, 1) + bytes([9]), blocks[1][1])
+
+        interface, ts_high, ts_low, caplen, wirelen = struct.unpack("IIIII", blocks[4][1][:20])
+        self.assertEqual((interface, (ts_high << 32) | ts_low, caplen, wirelen), (2, 1000000000123, 3, 3))
+        self.assertEqual(blocks[4][1][20:23], b"\x01\x02\x03")
+        self.assertIn(struct.pack("HH", 1, 13) + b"type=1 crc=ok", blocks[4][1])
+        self.assertIn(struct.pack("HHI", 2, 4, 0x00000001), blocks[4][1])
+        interface, ts_high, ts_low, caplen, wirelen = struct.unpack("IIIII", blocks[5][1][:20])
+        self.assertEqual((interface, (ts_high << 32) | ts_low), (0, 1001500000000))
+        self.assertIn(struct.pack("HHI", 2, 4, 0x01000001), blocks[5][1])
+
+    def test_006_read(self):
+        for pcapng in (False, True):
+            writer = pcap_writer(self.filename, flush_packets=0, pcapng=pcapng, num_interfaces=2)
+            writer.write(1000.25, b"\x01\x02\x03", interface=1)
+            writer.write(1001.5, b"\x04", crc_ok=False)
+            writer.write(1002.0, b"\x05\x06")
+            writer.close()
+            with pcap_reader(self.filename) as reader:
+                packets = [(timestamp, bytes(data)) for timestamp, data in reader]
+            expected = [(1000.25, b"\x01\x02\x03"), (1001.5, b"\x04"), (1002.0, b"\x05\x06")]
+            if pcapng:
+                del expected[1]
+            self.assertEqual(len(packets), len(expected))
+            for (timestamp, data), (expected_timestamp, expected_data) in zip(packets, expected):
+                self.assertAlmostEqual(timestamp, expected_timestamp, places=6)
+                self.assertEqual(data, expected_data)
+
+    def test_007_read_big_endian_truncated(self):
+        with open(self.filename, "wb") as f:
+            f.write(struct.pack(">IHHIIII", 0xa1b2c3d4, 2, 4, 0, 0, 32767, 147))
+            f.write(struct.pack(">IIII", 1000, 500000, 2, 2) + b"\x01\x02")
+            f.write(struct.pack(">IIII", 1001, 0, 4, 4) + b"\x03")
+        with pcap_reader(self.filename) as reader:
+            self.assertEqual([(timestamp, bytes(data)) for timestamp, data in reader], [(1000.5, b"\x01\x02")])
+
+        with open(self.filename, "wb") as f:
+            f.write(b"\x00" * 24)
+        self.assertRaises(ValueError, pcap_reader, self.filename)
+
+    def test_008_write_errors(self):
+        class failing_writer(pcap_writer):
+            def _write(self, timestamp, data, *args):
+                if data == b"bad":
+                    raise OSError("No space left on device")
+                super()._write(timestamp, data, *args)
+
+        writer = failing_writer(self.filename, queue_size=1)
+        for data in [b"\x01", b"bad", b"bad", b"\x02"]:
+            while not writer.write(0, data):
+                time.sleep(0.001)
+        writer.close()
+        self.assertEqual((writer.written, writer.write_errors), (2, 2))
+        self.assertEqual([record[2] for record in self.read_records()], [b"\x01", b"\x02"])
+
+    def test_009_close_after_thread_died(self):
+        class broken_writer(pcap_writer):
+            def _write(self, *args):
+                raise RuntimeError("bug")
+
+        excepthook = threading.excepthook
+        threading.excepthook = lambda args: None
+        try:
+            writer = broken_writer(self.filename, queue_size=1)
+            writer.write(0, b"\x01")
+            writer.thread.join()
+            self.assertTrue(writer.write(0, b"\x02"))
+            writer.close()
+        finally:
+            threading.excepthook = excepthook
+        self.assertIsNone(writer.thread)
+
+    def test_010_rotate_size_pcapng(self):
+        directory = os.path.join(self.tmpdir.name, "out")
+        # Room for the 1248 byte header and two 96 byte records, but not three
+        max_bytes = 1248 + 3 * 96 - 1
+        writer = rotating_pcap_writer(directory, "test-%Y.pcapng", max_bytes=max_bytes, flush_packets=0, pcapng=True,
+                                      num_interfaces=25)
+        for i in range(20):
+            writer.write(i, bytes([i]) * 10, interface=i % 25, comment="type=2 crc=ok manchester_errors=0")
+        writer.close()
+        packets = []
+        names = os.listdir(directory)
+        self.assertEqual(len(names), 10)
+        for name in names:
+            self.assertLessEqual(os.path.getsize(os.path.join(directory, name)), max_bytes)
+            with pcap_reader(os.path.join(directory, name)) as reader:
+                packets += [bytes(data) for _, data in reader]
+        self.assertEqual(sorted(packets), [bytes([i]) * 10 for i in range(20)])
+
+        self.assertRaises(ValueError, rotating_pcap_writer, directory, max_bytes=1248, pcapng=True, num_interfaces=25)
+        rotating_pcap_writer(directory, max_bytes=1248).close()
+
+    def test_011_restart(self):
+        directory = os.path.join(self.tmpdir.name, "out")
+        writer = rotating_pcap_writer(directory, "test-%Y.pcap", flush_packets=0)
+        writer.write(0, b"\x00")
+        writer.close()
+        first = writer.filename
+        # Refused until the writer is started again, which opens a new file
+        self.assertFalse(writer.write(1, b"\x01"))
+        self.assertEqual((writer.queued, writer.dropped), (1, 1))
+        writer.start()
+        self.assertTrue(writer.write(2, b"\x02"))
+        writer.close()
+        self.assertNotEqual(writer.filename, first)
+        self.assertEqual(self.read_records(first), [(0, 0, b"\x00")])
+        self.assertEqual(self.read_records(writer.filename), [(2, 0, b"\x02")])
+        self.assertEqual(writer.written, 2)
+
+    def test_012_default_extension(self):
+        for pcapng, ext in ((False, ".pcap"), (True, ".pcapng")):
+            writer = rotating_pcap_writer(self.tmpdir.name, pcapng=pcapng)
+            writer.close()
+            self.assertEqual(os.path.splitext(writer.filename)[1], ext)
+
+
+if __name__ == '__main__':
+    gr_unittest.run(qa_pcap)
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright 2026 Clayton Smith.
+#
+# This is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this software; see the file COPYING.  If not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street,
+# Boston, MA 02110-1301, USA.
+#
+
+import numpy
+from gnuradio import gr_unittest
+from elster import sync
+from elster.metrics import channel_stats
+from elster.sync import find_sync, find_sync_reference, find_sync_soft, PREAMBLE, SFD_1, SFD_2
+
+
+class qa_sync(gr_unittest.TestCase):
+
+    def setUp(self):
+        self.rng = numpy.random.default_rng(1)
+
+    def make_bits(self, syncs, length=4000):
+        bits = self.rng.integers(0, 2, length, dtype=numpy.uint8)
+        for offset, sfd in syncs:
+            bits[offset:offset+256] = numpy.concatenate([PREAMBLE, SFD_1 if sfd == 1 else SFD_2])
+        return bits
+
+    def test_001_matches_reference(self):
+        syncs = [(17, 1), (700, 2), (1501, 2), (3744, 1)]
+        bits = self.make_bits(syncs)
+        offsets, types = find_sync(bits)
+        ref_offsets, ref_types = find_sync_reference(bits)
+        self.assertEqual(list(zip(offsets, types)), syncs)
+        self.assertEqual(list(zip(ref_offsets, ref_types)), syncs)
+
+    def test_002_bit_errors(self):
+        bits = self.make_bits([(100, 2)])
+        bits[[110, 200, 300]] ^= 1
+        offsets, types = find_sync(bits)
+        self.assertEqual(len(offsets), 0)
+        self.assertEqual(len(find_sync_reference(bits)[0]), 0)
+        offsets, types = find_sync(bits, max_errors=3)
+        self.assertEqual(list(zip(offsets, types)), [(100, 2)])
+
+    def test_003_short_input(self):
+        bits = numpy.concatenate([PREAMBLE, SFD_1])
+        self.assertEqual(list(find_sync(bits)[0]), [0])
+        self.assertEqual(list(find_sync(bits[:-1])[0]), [])
+        self.assertEqual(list(find_sync_reference(bits)[0]), [0])
+        self.assertEqual(list(find_sync_reference(bits[:-1])[0]), [])
+
+    def test_004_soft(self):
+        syncs = [(50, 1), (900, 2), (2000, 1)]
+        bits = self.make_bits(syncs)
+        symbols = (bits * 2.0 - 1) * 0.3 + self.rng.normal(0, 0.3, len(bits))
+        offsets, types = find_sync_soft(symbols, 0.5)
+        self.assertEqual(list(zip(offsets, types)), syncs)
+
+    def test_005_exact_matches_correlation(self):
+        bits = self.make_bits([(17, 1), (700, 2), (1501, 2), (3744, 1)])
+        # A long preamble, and syncs on either side of the window edges
+        bits[2000:2400] = numpy.resize(PREAMBLE, 400)
+        bits[2400:2528] = SFD_1
+        for first, last in ((0, None), (17, 1501), (18, 1502), (2100, 3744)):
+            stats = channel_stats()
+            offsets, types = find_sync(bits, first=first, last=last, stats=stats)
+            end = len(bits) - 255 if last is None else last
+            ref_offsets, ref_types, preambles = sync._find_correlate(bits, 0, first, end)
+            keep = (ref_offsets >= first) & (ref_offsets < end)
+            self.assertEqual(list(offsets), list(ref_offsets[keep]))
+            self.assertEqual(list(types), list(ref_types[keep]))
+            self.assertEqual(stats.preamble_hits, len(preambles))
+
+    def test_006_matches_reference_windows(self):
+        bits = self.make_bits([(17, 1), (700, 2), (1501, 2), (3744, 1)])
+        bits[2000:2400] = numpy.resize(PREAMBLE, 400)
+        bits[2400:2528] = SFD_1
+        for first, last in ((0, None), (17, 1501), (18, 1502), (2100, 3744), (2004, 2010)):
+            stats, ref_stats = channel_stats(), channel_stats()
+            found = find_sync(bits, first=first, last=last, stats=stats, return_preambles=True)
+            ref_found = find_sync_reference(bits, first=first, last=last, stats=ref_stats, return_preambles=True)
+            for result, ref_result in zip(found, ref_found):
+                self.assertEqual(list(result), list(ref_result))
+            self.assertEqual(stats.preamble_hits, ref_stats.preamble_hits)
+
+
+if __name__ == '__main__':
+    gr_unittest.run(qa_sync)
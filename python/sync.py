@@ -0,0 +1,210 @@
+#
+# Copyright 2026 Clayton Smith.
+#
+# This is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this software; see the file COPYING.  If not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street,
+# Boston, MA 02110-1301, USA.
+#
+
+import numpy
+
+PREAMBLE = numpy.repeat(numpy.array([1, 0]*16, dtype=numpy.uint8), 4)
+SFD_1 = numpy.repeat(numpy.array([0, 1, 0, 1, 0, 1, 0, 1, 1, 0, 1, 0, 0, 1, 0, 1, 1, 0, 0, 1, 1, 0, 1, 0, 1, 0, 1, 0, 0, 1, 1, 0], dtype=numpy.uint8), 4)
+SFD_2 = numpy.repeat(numpy.array([1, 0, 0, 1, 1, 0, 1, 0, 1, 0, 0, 1, 1, 0, 0, 1, 1, 0, 1, 0, 0, 1, 1, 0, 0, 1, 0, 1, 0, 1, 1, 0], dtype=numpy.uint8), 4)
+SYNC_LEN = len(PREAMBLE) + len(SFD_1)
+
+_PREAMBLE_SYMBOLS = PREAMBLE.astype(numpy.float32) * 2 - 1
+_SFD_1_SYMBOLS = SFD_1.astype(numpy.float32) * 2 - 1
+_SFD_2_SYMBOLS = SFD_2.astype(numpy.float32) * 2 - 1
+
+_PREAMBLE_BYTES = PREAMBLE.tobytes()
+# Packed 8 bits to a byte, the preamble holds at least 15 whole bytes, all the same
+# rotation of 0xf0.  A run of rotations is looked for first, as a cheap filter.
+_ROTATIONS = [((0xf0 << shift) | (0xf0 >> (8 - shift))) & 0xff for shift in range(8)]
+_ROTATION_TABLE = bytes(1 if byte in _ROTATIONS else 0 for byte in range(256))
+_ROTATION_RUN = bytes([1]) * (len(PREAMBLE) // 8 - 1)
+_SFD_1_BYTES = SFD_1.tobytes()
+_SFD_2_BYTES = SFD_2.tobytes()
+
+# The preamble repeats every PREAMBLE_PERIOD bits
+PREAMBLE_PERIOD = 8
+
+# Neighbouring offsets on each side that a soft sync score must beat.  The
+# preamble is periodic, so shifted copies of it still score partially.
+PEAK_RUN = SYNC_LEN // 2
+
+_NO_SYNC = (numpy.array([], dtype=numpy.int64), numpy.array([], dtype=numpy.uint8))
+_NO_SYNC_PREAMBLES = _NO_SYNC + (_NO_SYNC[0],)
+
+
+def _errors(symbols, template):
+    # With both sides mapped to +/-1, correlation = len(template) - 2 * (Hamming distance)
+    return (len(template) - numpy.correlate(symbols, template, "valid")) / 2
+
+
+def _preamble_starts(matches, first, last):
+    # A longer preamble matches at a run of offsets PREAMBLE_PERIOD apart; keep each run's start
+    starts = matches.copy()
+    starts[PREAMBLE_PERIOD:] &= ~matches[:-PREAMBLE_PERIOD]
+    return numpy.flatnonzero(starts[first:last]) + first
+
+
+def _select(offsets, types, first, last):
+    keep = (offsets >= first) & (offsets < last)
+    return offsets[keep], types[keep]
+
+
+def _result(offsets, types, preambles, first, last, stats, return_preambles):
+    if stats is not None:
+        stats.preamble_hits += len(preambles)
+    offsets, types = _select(offsets, types, first, last)
+    return (offsets, types, preambles) if return_preambles else (offsets, types)
+
+
+def _find_exact(bits, first, last):
+    # Finds the preamble with bytes.find and compares the SFD only where it matched.
+    # Returns None when no preamble starts in [first, last), which is most of the time.
+    # A match PREAMBLE_PERIOD bits before first shows whether a preamble at first continues a run
+    start = max(first - PREAMBLE_PERIOD, 0)
+    end = min(len(bits) - SYNC_LEN, last - 1) + len(PREAMBLE)
+    if _ROTATION_RUN not in numpy.packbits(bits[start:end]).tobytes().translate(_ROTATION_TABLE):
+        return None
+    bits_string = bits.tobytes()
+    offset = bits_string.find(_PREAMBLE_BYTES, start, end)
+    if offset == -1 or (offset < first and bits_string.find(_PREAMBLE_BYTES, first, end) == -1):
+        return None
+    offsets = []
+    types = []
+    preambles = []
+    previous = None
+    while offset != -1:
+        if offset >= first:
+            if offset != previous:
+                preambles.append(offset)
+            sfd = bits_string[offset+128:offset+256]
+            if sfd == _SFD_1_BYTES:
+                offsets.append(offset)
+                types.append(1)
+            elif sfd == _SFD_2_BYTES:
+                offsets.append(offset)
+                types.append(2)
+        previous = offset + PREAMBLE_PERIOD
+        offset = bits_string.find(_PREAMBLE_BYTES, previous, end)
+    return (numpy.array(offsets, dtype=numpy.int64), numpy.array(types, dtype=numpy.uint8),
+            numpy.array(preambles, dtype=numpy.int64))
+
+
+def _find_correlate(bits, max_errors, first, last):
+    symbols = bits.astype(numpy.float32) * 2 - 1
+    n = len(PREAMBLE)
+    preamble_errors = _errors(symbols[:len(symbols) - n], _PREAMBLE_SYMBOLS)
+    sfd_1_errors = preamble_errors + _errors(symbols[n:], _SFD_1_SYMBOLS)
+    sfd_2_errors = preamble_errors + _errors(symbols[n:], _SFD_2_SYMBOLS)
+    offsets = numpy.flatnonzero(numpy.minimum(sfd_1_errors, sfd_2_errors) <= max_errors)
+    types = numpy.where(sfd_1_errors[offsets] <= sfd_2_errors[offsets], 1, 2).astype(numpy.uint8)
+    return offsets, types, _preamble_starts(preamble_errors <= max_errors, first, last)
+
+
+def find_sync(bits, max_errors=0, first=0, last=None, stats=None, return_preambles=False):
+    """Return the offsets and SFD types (1 or 2) of every preamble + SFD in bits.
+
+    A candidate is reported when the combined preamble and SFD Hamming distance
+    is at most max_errors.  Only offsets in [first, last) are reported, in
+    increasing order.  If stats is given, its preamble_hits is incremented.
+    With return_preambles=True, the offsets at which preamble runs start in
+    [first, last) are returned as well.
+
+    Exact matches are found with bytes.find, after a cheap check of the
+    packed bits rules out most inputs; a tolerance needs a correlation over
+    every offset, which is many times slower.
+    """
+    if len(bits) < SYNC_LEN:
+        return _NO_SYNC_PREAMBLES if return_preambles else _NO_SYNC
+    last = len(bits) - SYNC_LEN + 1 if last is None else last
+    if max_errors == 0:
+        found = _find_exact(bits, first, last)
+        if found is None:
+            return _NO_SYNC_PREAMBLES if return_preambles else _NO_SYNC
+        offsets, types, preambles = found
+    else:
+        offsets, types, preambles = _find_correlate(bits, max_errors, first, last)
+    return _result(offsets, types, preambles, first, last, stats, return_preambles)
+
+
+def find_sync_soft(symbols, threshold=0.8, first=0, last=None, stats=None, return_preambles=False):
+    """Return the offsets and SFD types of every preamble + SFD in soft symbols.
+
+    Symbols are positive for a 1 bit and negative for a 0 bit.  The score at
+    each offset is the correlation with the template, normalized by the
+    symbol magnitudes so that a perfect match scores 1.  Candidates score at
+    least threshold and are the best score within PEAK_RUN offsets, so the
+    symbols should extend PEAK_RUN offsets beyond [first, last).  stats and
+    return_preambles are as for find_sync.
+    """
+    if len(symbols) < SYNC_LEN:
+        return _NO_SYNC_PREAMBLES if return_preambles else _NO_SYNC
+    last = len(symbols) - SYNC_LEN + 1 if last is None else last
+    symbols = numpy.asarray(symbols, dtype=numpy.float32)
+    n = len(PREAMBLE)
+    preamble_corr = numpy.correlate(symbols[:len(symbols) - n], _PREAMBLE_SYMBOLS, "valid")
+    sfd_1_corr = preamble_corr + numpy.correlate(symbols[n:], _SFD_1_SYMBOLS, "valid")
+    sfd_2_corr = preamble_corr + numpy.correlate(symbols[n:], _SFD_2_SYMBOLS, "valid")
+    magnitude = numpy.convolve(numpy.abs(symbols), numpy.ones(n, dtype=numpy.float32), "valid")
+    tiny = numpy.finfo(numpy.float32).tiny
+    preamble_score = preamble_corr / numpy.maximum(magnitude[:len(preamble_corr)], tiny)
+    preambles = _preamble_starts(preamble_score >= threshold, first, last)
+    score = numpy.maximum(sfd_1_corr, sfd_2_corr) / numpy.maximum(magnitude[:len(sfd_1_corr)] + magnitude[n:], tiny)
+
+    peaks = []
+    for offset in numpy.flatnonzero(score[first:last] >= threshold) + first:
+        start = max(offset - PEAK_RUN, 0)
+        if start + score[start:offset + PEAK_RUN + 1].argmax() == offset:
+            peaks.append(offset)
+    offsets = numpy.array(peaks, dtype=numpy.int64)
+    types = numpy.where(sfd_1_corr[offsets] >= sfd_2_corr[offsets], 1, 2).astype(numpy.uint8)
+    return _result(offsets, types, preambles, first, last, stats, return_preambles)
+
+
+def find_sync_reference(bits, first=0, last=None, stats=None, return_preambles=False):
+    """Exact-match search as the block originally did it, for comparison.
+
+    Every offset at which the preamble matches is found with bytes.find and
+    its SFD compared in turn, without the packed prefilter or run skipping
+    that find_sync uses.  Arguments and results are as for find_sync with
+    max_errors=0.
+    """
+    if len(bits) < SYNC_LEN:
+        return _NO_SYNC_PREAMBLES if return_preambles else _NO_SYNC
+    last = len(bits) - SYNC_LEN + 1 if last is None else last
+    bits_string = bits.tobytes()
+    offsets = []
+    types = []
+    preambles = []
+    offset = bits_string.find(_PREAMBLE_BYTES, 0, len(bits) - len(SFD_1))
+    while offset != -1:
+        if first <= offset < last:
+            if offset < PREAMBLE_PERIOD or bits_string[offset-PREAMBLE_PERIOD:offset-PREAMBLE_PERIOD+len(PREAMBLE)] != _PREAMBLE_BYTES:
+                preambles.append(offset)
+            if bits_string[offset+128:offset+256] == _SFD_1_BYTES:
+                offsets.append(offset)
+                types.append(1)
+            elif bits_string[offset+128:offset+256] == _SFD_2_BYTES:
+                offsets.append(offset)
+                types.append(2)
+        offset = bits_string.find(_PREAMBLE_BYTES, offset + 1, len(bits) - len(SFD_1))
+    if stats is not None:
+        stats.preamble_hits += len(preambles)
+    offsets = numpy.array(offsets, dtype=numpy.int64)
+    types = numpy.array(types, dtype=numpy.uint8)
+    return (offsets, types, numpy.array(preambles, dtype=numpy.int64)) if return_preambles else (offsets, types)